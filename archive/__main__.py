@@ -1,14 +1,16 @@
-from .archive_id import new_archive_id, box_id_bytes, folder_id_bytes
-from .labels import box_labels, folder_labels_pdf
-from .placement import  ArchiveMap, Box, Folder, compute_folder_placement, compute_box_folders, compute_document_placement
-from .scan import scan_documents
-from .mnemonic.encode import encode
-
-import archive.paperless as paperless
+from .archive_id import new_archive_id, box_id_bytes, box_ids, folder_ids
+from .mnemonic.encode import encode, encode_many
 
 import os
 import sys
 import argparse
+import contextlib
+import itertools
+import string
+
+# Entry points import the subsystems they use (NumPy for placements,
+# urllib3 for paperless, WeasyPrint for labels, pyzbar for scanning) when
+# they need them, so small commands like new-id start quickly.
 
 def new_id():
     print(encode(box_id_bytes(os.urandom(16)) + b'\xff\xff\xff'))
@@ -24,11 +26,67 @@ def get_archive_key() -> bytes:
 
     return key
 
+def parse_weights(weights):
+    return [float(w) for w in weights.split(',')]
+
+def parse_region(region):
+    box = tuple(float(x) for x in region.split(','))
+    if len(box) != 4 or not (0 <= box[0] < box[2] <= 1 and 0 <= box[1] < box[3] <= 1):
+        raise argparse.ArgumentTypeError(f'Invalid region "{region}"')
+    return box
+
+# Scale for barcode detection within --barcode-region.
+DEFAULT_BARCODE_SCALE = 0.5
+
+def parse_scale(scale):
+    s = float(scale)
+    if not 0 < s <= 1:
+        raise argparse.ArgumentTypeError(f'Invalid scale "{scale}", must be in (0, 1]')
+    return s
+
+def get_map_config():
+    config = {}
+    if boxes := os.getenv('ARCHIVE_BOXES'):
+        config['boxes'] = int(boxes)
+    if folders := os.getenv('ARCHIVE_FOLDERS'):
+        config['folders'] = int(folders)
+    if weights := os.getenv('ARCHIVE_BOX_WEIGHTS'):
+        config['box_weights'] = parse_weights(weights)
+    if bucket_size := os.getenv('ARCHIVE_BUCKET_SIZE'):
+        config['bucket_size'] = int(bucket_size)
+    return config
+
 def get_archive_map():
+    from .placement import ArchiveMap
     key = get_archive_key()
-    return ArchiveMap.new(key = key)
+    return ArchiveMap.new(key = key, **get_map_config())
+
+def add_index_argument(p):
+    p.add_argument('--no-index', action='store_false', dest='use_index', default=True,
+                   help='Compute placements from scratch instead of using the placement index')
+
+def open_placement_index(archive_map, opts):
+    if not opts.use_index:
+        return contextlib.nullcontext()
+    from .placement_index import PlacementIndex
+    return PlacementIndex.open(archive_map)
+
+def add_cache_argument(p):
+    p.add_argument('--no-cache', action='store_false', dest='use_cache', default=True,
+                   help='Fetch all document IDs from paperless instead of syncing the local ID cache')
+
+def get_document_ids(opts):
+    if not opts.use_cache:
+        from . import paperless
+        return list(paperless.document_ids())
+    from .id_cache import DocumentIdCache
+    with DocumentIdCache.open() as cache:
+        cache.sync()
+        return cache.ids()
 
 def box_label_gen():
+    from .labels import box_labels
+
     p = argparse.ArgumentParser(description='Generate box labels')
     p.add_argument('box', type = int, nargs='+', help = 'which label to generate')
     p.add_argument('--print', action='store_true', help = "Print the label", default=False)
@@ -38,9 +96,11 @@ def box_label_gen():
 
     key = get_archive_key()
 
-    box_labels(sorted(box_id_bytes(str(i).encode('utf-8'), key=key) for i in opts.box), print=opts.print, save=opts.save)
+    box_labels(sorted(box_ids(key).ids(str(i).encode('utf-8') for i in opts.box)), print=opts.print, save=opts.save)
 
 def folder_label_gen():
+    from .labels import folder_labels_pdf
+
     p = argparse.ArgumentParser(description='Generate folder label sheet')
     p.add_argument('sheet', type=int, help = 'which sheet to generate')
     p.add_argument('out', type=str, default = '-', nargs='?', help = 'output file or - for stdout (the default)')
@@ -52,39 +112,60 @@ def folder_label_gen():
     if opts.out == '-':
         target = os.fdopen(sys.stdout.fileno(), 'wb')
     
-    folder_labels_pdf(sorted(folder_id_bytes(str(i).encode('utf-8'), key = key) for i in range((opts.sheet-1)*39 + 1, opts.sheet*39 + 1)), target)
+    folder_labels_pdf(sorted(folder_ids(key).numbered((opts.sheet-1)*39 + 1, opts.sheet*39 + 1)), target)
 
     if opts.out == '-':
         target.close()
 
 def archive_map_cli():
     p = argparse.ArgumentParser(description='Archive mapping')
+    add_index_argument(p)
+    add_cache_argument(p)
+    p.add_argument('-j', '--jobs', type=int, default=1,
+                   help='Number of processes computing placements, 0 for one per CPU (default 1)')
     subparsers = p.add_subparsers(help='Subcommands', dest='command')
 
     subparsers.add_parser('show', help='Show the archive map')
 
     subparsers.add_parser('place-folder', help='Compute folder location') \
-        .add_argument('id', type=str, nargs='+', help='Folder ID')
+        .add_argument('id', type=str, nargs='+', help='Folder ID, in hex or as mnemonic')
 
     subparsers.add_parser('folders-in-box', help='Compute box contents') \
-        .add_argument('id', type=str, nargs='+', help='Box ID')
+        .add_argument('id', type=str, nargs='+', help='Box ID, in hex or as mnemonic')
+
+    r = subparsers.add_parser('plan-rebalance', help='List the moves needed to switch to another map configuration')
+    r.add_argument('--boxes', type=int, help='Number of boxes in the new map')
+    r.add_argument('--folders', type=int, help='Number of folders in the new map')
+    r.add_argument('--box-weights', type=parse_weights, help='Comma separated box weights of the new map')
+    r.add_argument('--bucket-size', type=int, help='Box bucket size of the new map')
+    r.add_argument('--documents', action='store_true', default=False, help='Also list the documents that move')
 
     return p
 
+def parse_id(s):
+    if all(c in string.hexdigits for c in s):
+        return bytes.fromhex(s)
+    from .mnemonic.decode import decode
+    return decode(s, length=8)
+
 def make_folder(folder_id):
-    b = bytes.fromhex(folder_id)
+    from .placement import Folder
+    b = parse_id(folder_id)
     if len(b) != 8:
         raise ValueError("Folder ID must be 8 bytes long")
     return Folder(b)
 
 def make_box(box_id):
-    b = bytes.fromhex(box_id)
+    from .placement import Box
+    b = parse_id(box_id)
     if len(b) != 8:
         raise ValueError("Box ID must be 8 bytes long")
     return Box(b)
 
 def archive_map():
     opts = archive_map_cli().parse_args()
+    if opts.jobs < 1:
+        opts.jobs = os.cpu_count() or 1
 
     a = get_archive_map()
 
@@ -96,16 +177,38 @@ def archive_map():
         case "place-folder":
             for i in opts.id:
                 folder = make_folder(i)
-                box = compute_folder_placement(a, folder)
+                box = a.folder_box(folder)
                 print(f'{folder} -> {box}')
                 print(f'{encode(folder.id)} -> {encode(box.id)}')
 
         case "folders-in-box":
-            for i in opts.id:
-                b = make_box(i)
-                print(f'{b} {encode(b.id)}')
-                for f in compute_box_folders(a, b):
-                    print(f'{f} {encode(f.id)}')
+            with open_placement_index(a, opts) as index:
+                for i in opts.id:
+                    b = make_box(i)
+                    print(f'{b} {encode(b.id)}')
+                    for f in (index.box_folders(b) if index is not None else a.box_folders(b)):
+                        print(f'{f} {encode(f.id)}')
+
+        case "plan-rebalance":
+            from .placement import ArchiveMap
+            from .rebalance import folder_moves, document_moves
+
+            config = get_map_config()
+            for k in ('boxes', 'folders', 'box_weights', 'bucket_size'):
+                if getattr(opts, k) is not None:
+                    config[k] = getattr(opts, k)
+            new = ArchiveMap.new(key = get_archive_key(), **config)
+
+            for m in folder_moves(a, new):
+                print(f'{m.folder} {encode(m.folder.id)}: {m.old_box} -> {m.new_box}')
+
+            if opts.documents:
+                ids = get_document_ids(opts)
+                with open_placement_index(a, opts) as index:
+                    old_placement = index.update(ids, jobs=opts.jobs) if index is not None else None
+                print()
+                for m in document_moves(a, new, ids, old_placement, jobs=opts.jobs):
+                    print(f'{m.doc_id:010d}: {m.old_folder} {m.old_box} -> {m.new_folder} {m.new_box}')
 
 
 def documents_cli():
@@ -118,6 +221,10 @@ def documents_cli():
     DEFAULT_SIMPLEX_CODE = "Simplex Document 9b9466ff1dfcbb765c74f2bc529f92146c217e8d1ab71bf99e428cb6b524f52026653230fee8f8e80ed802ffacc78503a6cbc8e56b83cff5aaee85671f70c4b7"
 
     p = argparse.ArgumentParser(description = 'Paperless document interface')
+    add_index_argument(p)
+    add_cache_argument(p)
+    p.add_argument('-j', '--jobs', type=int, default=1,
+                   help='Number of processes computing placements, 0 for one per CPU (default 1)')
     subparsers = p.add_subparsers(help='Subcommands', dest='command')
 
     subparsers.add_parser('list-ids', help='List archive IDs of all documents')
@@ -127,12 +234,24 @@ def documents_cli():
     subparsers.add_parser('place-document', help='Print folder placement for specific documents') \
         .add_argument('id', type=int, nargs='+', help = 'Document ID')
 
+    subparsers.add_parser('folder-contents', help='List the documents placed in specific folders') \
+        .add_argument('id', type=str, nargs='+', help = 'Folder ID, in hex or as mnemonic')
+
     s = subparsers.add_parser('scan', help='Scan new documents and upload to paperless')
     s.add_argument('-u', '--scanner-host', help=f'Address of the scanner, defaults to {DEFAULT_SCANNER}', default=DEFAULT_SCANNER)
     s.add_argument('-S', '--scanner-source', help=f'Scanner source, can be "Flatbed" or "ADF", defaults to "{DEFAULT_SCAN_SOURCE}"', default=DEFAULT_SCAN_SOURCE)
     s.add_argument('-r', '--scanner-dpi', help=f'Scan resolution in DPI, defaults to {DEFAULT_SCAN_DPI}', default=DEFAULT_SCAN_DPI)
     s.add_argument('-f', '--scanner-https-fingerprint', help=f'Scanner certificate fingerprint, defaults to {DEFAULT_SCAN_FP}', default=DEFAULT_SCAN_FP)
+    s.add_argument('--scan-format', choices=['auto', 'jpeg', 'pdf'], default='auto',
+                   help='Retrieve pages one by one as JPEG, or whole scan jobs as PDF; "auto" (the default) uses JPEG if the scanner supports it')
+    s.add_argument('--scanner-timeout', type=float, help='Give up waiting for the scanner after this many seconds, defaults to waiting forever', default=None)
     s.add_argument('-s', '--simplex', help=f'Run simplex cycle', action='store_false', dest='duplex', default=True)
+    s.add_argument('--barcode-region', type=parse_region, metavar='LEFT,TOP,RIGHT,BOTTOM', default=None,
+                   help='Only look for barcodes in this part of the page, in fractions of the page size, e.g. "0,0,1,0.3" for the top 30%%')
+    s.add_argument('--barcode-scale', type=parse_scale, default=None,
+                   help=f'Look for barcodes on pages shrunk by this factor first, defaults to {DEFAULT_BARCODE_SCALE} with --barcode-region and to 1 (full resolution) without')
+    s.add_argument('--no-barcode-fallback', action='store_false', dest='barcode_fallback', default=True,
+                   help='Do not search pages without barcodes again at full resolution')
     s.add_argument('--document-separator', help=f'Page separator barcode value', default=DEFAULT_SEPARATOR_CODE)
     s.add_argument('--document-simplex', help=f'Barcode value for a simplex document', default=DEFAULT_SIMPLEX_CODE)
 
@@ -144,69 +263,150 @@ def documents_cli():
     return p
 
 class DocumentPlacement:
+    __slots__ = ('doc_id', 'folder', 'box')
+
     doc_id: int
-    folder: Folder
-    box: Box
+    folder: 'Folder'
+    box: 'Box'
 
-    def __init__(self, archive_map, doc_id):
+    def __init__(self, archive_map, doc_id, folder=None, box=None):
+        from .placement import compute_document_placement
         self.doc_id = doc_id
-        self.folder = compute_document_placement(archive_map, self.doc_id)
-        self.box = compute_folder_placement(archive_map, self.folder)
+        self.folder = folder if folder is not None else compute_document_placement(archive_map, self.doc_id)
+        self.box = box if box is not None else archive_map.folder_box(self.folder)
 
-    def print(self):
+    def print(self, names=None):
+        (folder_name, box_name) = (names[self.folder], names[self.box]) if names else (encode(self.folder.id), encode(self.box.id))
         print(f'{self.doc_id:010d} -> {self.folder} -> {self.box}')
-        print(f'{self.doc_id:010d} -> {encode(self.folder.id)} -> {encode(self.box.id)}')
-
-def with_edges_on(gen, f):
-    last = None
-    for g in gen:
-        if last and last != f(g):
-            yield (g, True)
+        print(f'{self.doc_id:010d} -> {folder_name} -> {box_name}')
+
+def placement_chunks(archive_map, ids, index=None, jobs=1):
+    """Yield (doc ids, folder indices) arrays for consecutive chunks of ids.
+
+    With jobs > 1 one process pool places all chunks.
+    """
+    from .placement import place_documents, placement_pool, PLACEMENT_CHUNK
+    import numpy as np
+
+    it = iter(ids)
+    with placement_pool(jobs) as pool:
+        while chunk := list(itertools.islice(it, PLACEMENT_CHUNK * jobs)):
+            if index is not None:
+                folders = index.update(chunk, jobs=jobs, pool=pool)
+            else:
+                folders = place_documents(archive_map, chunk, jobs=jobs, pool=pool)
+            yield (np.array(chunk, dtype=np.int64), folders.astype(np.int32))
+
+def print_placements(archive_map, ids, opts):
+    # Placements are bucketed per box as compact id/folder index arrays while
+    # ids are streamed in; each box is sorted and printed once all ids are in.
+    import numpy as np
+
+    groups = [[] for _ in archive_map.boxes]
+    with open_placement_index(archive_map, opts) as index:
+        if index is not None:
+            folder_boxes = np.asarray(index.folder_boxes, dtype=np.intp)
         else:
-            yield (g, False)
-        last = f(g)
-
-def print_placements(archive_map, ids):
-    placements = sorted((DocumentPlacement(archive_map, id) for id in ids), key = lambda p: (p.box, p.doc_id))
-    for (p, do_nl) in with_edges_on(placements, lambda p: p.box):
-        if do_nl:
+            box_index = {b: i for (i, b) in enumerate(archive_map.boxes)}
+            folder_boxes = np.array([box_index[archive_map.folder_box(f)] for f in archive_map.folders], dtype=np.intp)
+
+        for (chunk, folders) in placement_chunks(archive_map, ids, index, jobs=opts.jobs):
+            boxes = folder_boxes[folders]
+            for b in np.unique(boxes).tolist():
+                in_box = boxes == b
+                groups[b].append((chunk[in_box], folders[in_box]))
+
+    labelled = archive_map.folders + archive_map.boxes
+    names = dict(zip(labelled, encode_many(x.id for x in labelled)))
+
+    first = True
+    for (box, group) in zip(archive_map.boxes, groups):
+        if not group:
+            continue
+        if not first:
             print()
-        p.print()
+        first = False
+
+        doc_ids = np.concatenate([g[0] for g in group])
+        folders = np.concatenate([g[1] for g in group])
+        order = np.argsort(doc_ids, kind='stable')
+        for (doc_id, f) in zip(doc_ids[order].tolist(), folders[order].tolist()):
+            DocumentPlacement(archive_map, doc_id, archive_map.folders[f], box).print(names)
 
 def documents():
     opts = documents_cli().parse_args()
+    if opts.jobs < 1:
+        opts.jobs = os.cpu_count() or 1
 
     match opts.command:
         case 'list-ids':
-            for id in paperless.document_ids():
+            for id in get_document_ids(opts):
                 print(f'{id:010d}')
 
         case 'print-placements':
             a = get_archive_map()
-            print_placements(a, paperless.document_ids())
+            print_placements(a, get_document_ids(opts), opts)
 
         case 'place-document':
             a = get_archive_map()
-            print_placements(a, opts.id)
+            print_placements(a, opts.id, opts)
+
+        case 'folder-contents':
+            from .placement import place_documents
+            import numpy as np
+
+            a = get_archive_map()
+            folder_index = {f: i for (i, f) in enumerate(a.folders)}
+            folders = [make_folder(i) for i in opts.id]
+            for f in folders:
+                if f not in folder_index:
+                    sys.exit(f'{f} {encode(f.id)} is not a folder of the archive map')
+
+            ids = np.array(get_document_ids(opts), dtype=np.int64)
+            with open_placement_index(a, opts) as index:
+                placed = index.update(ids, jobs=opts.jobs) if index is not None else place_documents(a, ids.tolist(), jobs=opts.jobs)
+            for f in folders:
+                print(f'{f} {encode(f.id)}')
+                for doc_id in np.sort(ids[np.flatnonzero(placed == folder_index[f])]).tolist():
+                    print(f'{doc_id:010d}')
 
         case 'new-id':
             print(f'{new_archive_id(os.urandom(16)):010d}')
 
         case 'scan':
-            docs = scan_documents(opts)
+            from .scan import scan_documents
+            from . import paperless
+
+            # Shrinking only pays off on a cropped page; on a whole page
+            # without barcodes the full resolution fallback costs more than
+            # it saves.
+            if opts.barcode_scale is None:
+                opts.barcode_scale = DEFAULT_BARCODE_SCALE if opts.barcode_region is not None else 1.0
+
+            ids = []
+            failed = 0
             with paperless.pool_manager() as http:
-                for d in docs:
-                    paperless.push_document(http, d)
+                for r in paperless.push_documents(http, scan_documents(opts)):
+                    ids.append(r.doc.id)
+                    if r.error is not None:
+                        failed += 1
+                        # Keep the scan, it only exists in memory; it can be
+                        # sent again with documents push.
+                        path = os.path.abspath(f'{r.doc.id:010d}.pdf')
+                        with open(path, 'wb') as f:
+                            f.write(r.doc.data)
+                        print(f'{r.doc.id:010d} upload failed after {r.attempts} attempts, saved to {path}: {r.error}', file=sys.stderr)
+                    print(f'{r.doc.id:010d}', flush=True)
 
             a = get_archive_map()
-            ids = [d.id for d in docs]
-            for i in ids:
-               print(f'{i:010d}')
             print('')
-            print_placements(a, ids)
+            print_placements(a, ids, opts)
+            if failed:
+                sys.exit(f'{failed} of {len(ids)} documents failed to upload, send the saved PDFs with documents push')
 
         case 'push':
+            from . import paperless
+
             filename = opts.file.name
-            doc = opts.file.read()
             with paperless.pool_manager() as http:
-                paperless.push(http, doc, filename, filename)
+                paperless.push(http, opts.file, filename, filename)
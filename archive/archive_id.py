@@ -1,6 +1,8 @@
 from blake3 import blake3
 from dataclasses import dataclass
 
+import functools
+
 @dataclass(frozen=True)
 class Document:
     data: bytes
@@ -9,18 +11,48 @@ class Document:
 ARCHIVE_ID_CONTEXT = 'paperless.kleen.org/v1 archive id generator'
 BOX_ID_CONTEXT = 'paperless.kleen.org/v1 box id generator'
 FOLDER_ID_CONTEXT = 'paperless.kleen.org/v1 folder id generator'
+BUCKET_ID_CONTEXT = 'paperless.kleen.org/v1 box bucket id generator'
 
 def new_archive_id(data):
     return int.from_bytes(blake3(data).digest(length=4), byteorder='little') & 0x7fffffff
 
+@functools.lru_cache(maxsize=64)
+def context_key(key, context):
+    return blake3(key, derive_key_context=context).digest()
+
+class IdGenerator:
+    """Keyed id generator for one derivation context.
+
+    The context key is derived once per (key, context) and the keyed hasher
+    state is copied for every id instead of being rebuilt.
+    """
+
+    def __init__(self, context, key=b''):
+        self._hasher = blake3(key=context_key(key, context))
+
+    def __call__(self, data):
+        h = self._hasher.copy()
+        h.update(data)
+        return h.digest(8)
+
+    def ids(self, datas):
+        return map(self, datas)
+
+    def numbered(self, start, stop):
+        """Generate the ids of str(i) for i in range(start, stop)."""
+        return self.ids(str(i).encode('utf-8') for i in range(start, stop))
+
+def box_ids(key=b''):
+    return IdGenerator(BOX_ID_CONTEXT, key=key)
+
+def folder_ids(key=b''):
+    return IdGenerator(FOLDER_ID_CONTEXT, key=key)
+
+def bucket_ids(key=b''):
+    return IdGenerator(BUCKET_ID_CONTEXT, key=key)
+
 def box_id_bytes(data, key=b''):
-    return blake3(
-        data,
-        key=blake3(key, derive_key_context=BOX_ID_CONTEXT).digest()) \
-        .digest(length=8)
+    return box_ids(key)(data)
 
 def folder_id_bytes(data, key=b''):
-    return blake3(
-        data,
-        key=blake3(key, derive_key_context=FOLDER_ID_CONTEXT).digest()) \
-        .digest(length=8)
+    return folder_ids(key)(data)
@@ -0,0 +1,16 @@
+import os
+
+def cache_dir():
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'archive')
+
+def cache_path(name, env=None):
+    """Return the path of cache file name, creating its directory.
+
+    If env names a set environment variable, its value is used instead.
+    """
+    path = os.getenv(env) if env else None
+    if not path:
+        path = os.path.join(cache_dir(), name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return path
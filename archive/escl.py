@@ -0,0 +1,78 @@
+import re
+import time
+
+# eSCL scanners offer no status notifications, so waiting means polling
+# /eSCL/ScannerStatus. The poll interval starts short and backs off while
+# the state stays the same, so a scanner that becomes ready right after a
+# pass is noticed within tens of milliseconds, while one waiting for the
+# operator is polled a few times a second.
+
+# The scanner and ADF states are all we look at, so they are picked out of
+# the status document directly instead of parsing the XML into a tree.
+# Job entries use JobState and are not matched.
+STATUS_FIELDS = re.compile(rb'<(?:\w+:)?(State|AdfState)>\s*([^<]*?)\s*</')
+STATUS_KEYS = {
+    b'State': 'pwg:State',
+    b'AdfState': 'scan:AdfState',
+}
+
+class ScannerTimeout(TimeoutError):
+    def __init__(self, timeout, status):
+        self.timeout = timeout
+        self.status = status
+
+    def __str__(self):
+        return f'Scanner not ready after {self.timeout}s: {self.status}'
+
+def parse_scanner_status(data: bytes) -> dict:
+    """Scanner and ADF state of a ScannerStatus document, keyed like the full XML."""
+    status = {}
+    for (k, v) in STATUS_FIELDS.findall(data):
+        status.setdefault(STATUS_KEYS[k], v.decode('utf-8'))
+    return status
+
+def get_scanner_status(http):
+    r = http.request('GET', '/eSCL/ScannerStatus')
+    return parse_scanner_status(r.data)
+
+class PollingWaiter:
+    """Wait for a scanner status by polling with exponential backoff.
+
+    The interval starts at interval, grows by factor up to max_interval and
+    drops back to interval whenever the status changes. With a timeout,
+    ScannerTimeout is raised once it has passed without the status being
+    ready.
+    """
+
+    def __init__(self, interval=0.02, factor=2.0, max_interval=0.25, timeout=None):
+        self.interval = interval
+        self.factor = factor
+        self.max_interval = max_interval
+        self.timeout = timeout
+
+    def wait(self, http, ready):
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        delay = self.interval
+        last = None
+        while True:
+            status = get_scanner_status(http)
+            if ready(status):
+                return status
+
+            if status != last:
+                delay = self.interval
+                last = status
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise ScannerTimeout(self.timeout, status)
+                time.sleep(min(delay, left))
+            else:
+                time.sleep(delay)
+            delay = min(delay * self.factor, self.max_interval)
+
+class FixedWaiter(PollingWaiter):
+    """Poll at a fixed interval, as done before the adaptive poller."""
+
+    def __init__(self, interval=1.0, timeout=None):
+        super().__init__(interval, 1.0, interval, timeout)
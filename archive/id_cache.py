@@ -0,0 +1,133 @@
+from .cache import cache_path
+from . import paperless
+
+import sqlite3
+
+# Local copy of the archive serial numbers in paperless, keyed by the
+# paperless document pk. A sync only asks for documents modified after the
+# newest modification time seen so far (the high-water mark). Deleted
+# documents are not listed by that query; they are dropped by comparing
+# the cached pks with the list of all numbered document pks paperless
+# includes in result pages. Versions without that list only report a
+# count: every addition since the last sync has been fetched by then, so
+# a deletion leaves more documents cached than paperless counts, and a
+# mismatch triggers a full reload.
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    pk INTEGER PRIMARY KEY,
+    asn INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_asn ON documents (asn);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+FIELDS = ['id', 'archive_serial_number', 'modified']
+HAS_ASN = { 'archive_serial_number__isnull': 'false' }
+
+def default_cache_path():
+    return cache_path('documents.sqlite', env='PAPERLESS_ID_CACHE')
+
+class DocumentIdCache:
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def open(path=None):
+        db = sqlite3.connect(path or default_cache_path())
+        db.executescript(SCHEMA)
+        return DocumentIdCache(db)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def count(self):
+        return self.db.execute('SELECT count(*) FROM documents').fetchone()[0]
+
+    def ids(self) -> list:
+        return [asn for (asn,) in self.db.execute('SELECT asn FROM documents ORDER BY asn')]
+
+    def clear(self):
+        self.db.execute('DELETE FROM documents')
+        self.db.execute('DELETE FROM meta')
+
+    def sync(self, concurrency=None):
+        """Bring the cache up to date with paperless.
+
+        Returns the number of documents fetched.
+        """
+        endpoint = paperless.paperless_endpoint()
+        if self.get_meta('endpoint') != endpoint:
+            with self.db:
+                self.clear()
+                self.set_meta('endpoint', endpoint)
+
+        since = self.get_meta('modified')
+        fetched = self.fetch(since, concurrency)
+        if since is not None and not self.check_deleted():
+            # Something is missing, or lost its serial number before the
+            # high-water mark; start over.
+            with self.db:
+                self.clear()
+                self.set_meta('endpoint', endpoint)
+            fetched = self.fetch(None, concurrency)
+        return fetched
+
+    def check_deleted(self):
+        """Drop documents paperless no longer has.
+
+        Returns whether the cache matches paperless afterwards.
+        """
+        pks = paperless.document_pks(HAS_ASN)
+        if pks is None:
+            return self.count() == paperless.document_count(HAS_ASN)
+
+        with self.db:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS current (pk INTEGER PRIMARY KEY)')
+            self.db.execute('DELETE FROM current')
+            self.db.executemany('INSERT OR IGNORE INTO current (pk) VALUES (?)', ((pk,) for pk in pks))
+            self.db.execute('DELETE FROM documents WHERE pk NOT IN (SELECT pk FROM current)')
+            self.db.execute('DELETE FROM current')
+        return self.count() == len(set(pks))
+
+    def fetch(self, since, concurrency=None):
+        # The full load only needs numbered documents, a delta also has to
+        # see documents whose serial number was removed.
+        query = { 'ordering': 'modified' }
+        if since is None:
+            query.update(HAS_ASN)
+        else:
+            # paperless 1.x only filters modified by gt and lt, and silently
+            # ignores other lookups.
+            query['modified__gt'] = since
+
+        fetched = 0
+        with self.db:
+            for doc in paperless.list_documents(fields = FIELDS, query = query, concurrency = concurrency):
+                if doc['archive_serial_number'] is None:
+                    self.db.execute('DELETE FROM documents WHERE pk = ?', (doc['id'],))
+                else:
+                    self.db.execute('INSERT OR REPLACE INTO documents (pk, asn) VALUES (?, ?)',
+                                    (doc['id'], doc['archive_serial_number']))
+                # Results come ordered by modification time, so the last
+                # one is the new high-water mark.
+                since = doc['modified']
+                fetched += 1
+            self.set_meta('modified', since)
+        return fetched
@@ -0,0 +1,113 @@
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'[.eE+\-]*')
+
+class Reader:
+    """Incremental JSON tokenizer over an iterable of byte chunks.
+
+    Only the consumed prefix of the input is dropped, so memory is bounded
+    by the largest single value being parsed rather than the whole body.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, grow=False):
+        """Read more input, until the buffer doubled if grow is set.
+
+        Returns False once the input is exhausted.
+        """
+        if self.eof:
+            return False
+        rest = self.buf[self.pos:]
+        parts = [rest]
+        size = len(rest)
+        target = 2 * size if grow else 0
+        while True:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                parts.append(self._utf8.decode(b'', final=True))
+                self.eof = True
+                break
+            text = self._utf8.decode(chunk)
+            parts.append(text)
+            size += len(text)
+            if text and size >= target:
+                break
+        self.buf = ''.join(parts)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character, '' at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f'Expected one of {chars!r} at JSON input, got {c!r}')
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                (v, end) = self._decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer, or followed only by
+                # the start of a fraction or exponent, may continue in the
+                # next chunk.
+                if self.eof or NUMBER_TAIL.fullmatch(self.buf, end) is None:
+                    self.pos = end
+                    return v
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(grow=True)
+
+def stream_member(chunks, key, meta, skip=()):
+    """Yield the elements of the array member key of a JSON object.
+
+    Elements are yielded as soon as they are parsed. The other members of
+    the object are stored in meta, except those named in skip, which are
+    parsed element by element and dropped.
+    """
+    r = Reader(chunks)
+    r.expect('{')
+    if r.peek() == '}':
+        return
+
+    while True:
+        k = r.value()
+        r.expect(':')
+        if (k == key or k in skip) and r.peek() == '[':
+            r.pos += 1
+            if r.peek() == ']':
+                r.pos += 1
+            else:
+                while True:
+                    v = r.value()
+                    if k == key:
+                        yield v
+                    if r.expect(',]') == ']':
+                        break
+        elif k in skip:
+            r.value()
+        else:
+            meta[k] = r.value()
+
+        if r.expect(',}') == '}':
+            return
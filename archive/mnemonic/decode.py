@@ -0,0 +1,81 @@
+from .wordlist import wordlist
+from .encode import BASE, BASE2
+
+import bisect
+import functools
+import itertools
+import re
+import string
+
+@functools.lru_cache(maxsize=None)
+def sorted_words():
+    return sorted(wordlist.words)
+
+def edits1(word):
+    """All strings one deletion, transposition, substitution or insertion away from word."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = (a + b[1:] for (a, b) in splits if b)
+    transposes = (a + b[1] + b[0] + b[2:] for (a, b) in splits if len(b) > 1)
+    replaces = (a + c + b[1:] for (a, b) in splits if b for c in string.ascii_lowercase)
+    inserts = (a + c + b for (a, b) in splits for c in string.ascii_lowercase)
+    return set(itertools.chain(deletes, transposes, replaces, inserts))
+
+def prefix_matches(prefix):
+    words = sorted_words()
+    i = bisect.bisect_left(words, prefix)
+    j = bisect.bisect_right(words, prefix + '\x7f')
+    return words[i:j]
+
+@functools.lru_cache(maxsize=4096)
+def word_index(word: str) -> int:
+    """Look up a word, accepting unambiguous prefixes and single typos."""
+    word = word.lower()
+    positions = wordlist.positions
+    i = positions.get(word)
+    if i is not None:
+        return i
+
+    matches = prefix_matches(word)
+    if not matches:
+        matches = sorted(c for c in edits1(word) if c in positions)
+
+    if len(matches) == 1:
+        return positions[matches[0]]
+    if matches:
+        raise ValueError(f'Ambiguous mnemonic word "{word}": {", ".join(matches)}')
+    raise ValueError(f'Unknown mnemonic word "{word}"')
+
+def words(text: str) -> list:
+    return re.findall('[a-zA-Z]+', text)
+
+def decode(text: str, length=None) -> bytes:
+    """Turn a mnemonic such as "word-word-word--word-word-word" back into bytes.
+
+    Any non-letters separate words, so label text with spaces and line
+    breaks decodes as well. Every three words give 4 bytes; pass length to
+    decode ids whose last chunk was shorter than 4 bytes.
+    """
+    ws = words(text)
+    if not ws or len(ws) % 3:
+        raise ValueError(f'A mnemonic consists of groups of three words, got {len(ws)}')
+
+    values = []
+    for i in range(0, len(ws), 3):
+        value = word_index(ws[i]) * BASE2 + word_index(ws[i+1]) * BASE + word_index(ws[i+2])
+        if value >= 2**32:
+            raise ValueError(f'Invalid mnemonic group "{"-".join(ws[i:i+3])}"')
+        values.append(value)
+
+    n = 4 * len(values)
+    if length is None:
+        length = n
+    tail = length - (n - 4)
+    if not 0 < tail <= 4:
+        raise ValueError(f'{len(values)} mnemonic groups can not encode {length} bytes')
+    if values[-1] >= 2**(8*tail):
+        raise ValueError(f'Last mnemonic group does not fit into {tail} bytes')
+
+    return b''.join(v.to_bytes(4, byteorder='big') for v in values[:-1]) + values[-1].to_bytes(tail, byteorder='big')
+
+def decode_many(texts, length=None) -> list:
+    return [decode(text, length) for text in texts]
@@ -1,7 +1,9 @@
 from .wordlist import wordlist
 import itertools
+import struct
 
 BASE = len(wordlist)
+BASE2 = BASE * BASE
 assert BASE*BASE*BASE >= 2**32
 
 def encode32(x: int):
@@ -10,16 +12,60 @@ def encode32(x: int):
     return (x // BASE // BASE, (x // BASE) % BASE, x % BASE)
 
 def to_words(tuple):
-    return (wordlist[x] for x in tuple)
+    w = wordlist.words
+    return (w[x] for x in tuple)
 
 def chunked_bytes(gen, max_size):
     it = iter(gen)
     for first in it:
         yield bytes(itertools.chain([first], itertools.islice(it, max_size-1)))
 
+def unpack32(src) -> list:
+    """Split src into big-endian 4 byte values; a shorter tail is read as is."""
+    src = bytes(src)
+    n = len(src) // 4
+    values = list(struct.unpack_from(f'>{n}I', src))
+    if len(src) % 4:
+        values.append(int.from_bytes(src[4*n:], byteorder='big'))
+    return values
+
+def encode_values(values, word_sep = '-') -> list:
+    w = wordlist.words
+    return [word_sep.join((w[x // BASE2], w[x // BASE % BASE], w[x % BASE])) for x in values]
+
 def encode(src: bytes, sep = '--', word_sep = '-') -> str:
-    chunks = (word_sep.join(to_words(encode32(int.from_bytes(bs, byteorder='big')))) for bs in chunked_bytes(src, 4))
-    return sep.join(chunks)
+    return sep.join(encode_values(unpack32(src), word_sep))
+
+def encode_many(srcs, sep = '--', word_sep = '-') -> list:
+    """Encode many ids at once, same as [encode(src) for src in srcs].
+
+    Ids of one common length are unpacked together: with a single struct
+    call over their concatenation if the length is a multiple of 4 bytes,
+    otherwise one precompiled struct call per id for the full chunks and
+    the short tail.
+    """
+    srcs = [bytes(src) for src in srcs]
+    if not srcs:
+        return []
+    length = len(srcs[0])
+    if length == 0 or any(len(src) != length for src in srcs):
+        return [encode(src, sep, word_sep) for src in srcs]
+
+    (k, tail) = divmod(length, 4)
+    data = b''.join(srcs)
+    if tail:
+        values = []
+        for row in struct.Struct(f'>{k}I{tail}s').iter_unpack(data):
+            values.extend(row[:k])
+            values.append(int.from_bytes(row[k], byteorder='big'))
+        k += 1
+    else:
+        values = struct.unpack(f'>{k*len(srcs)}I', data)
+
+    chunks = encode_values(values, word_sep)
+    if k == 1:
+        return chunks
+    return [sep.join(chunks[i:i+k]) for i in range(0, len(chunks), k)]
 
 def encoded(src: bytes):
-    return itertools.chain.from_iterable(to_words(encode32(int.from_bytes(bs, byteorder='big'))) for bs in chunked_bytes(src, 4))
+    return itertools.chain.from_iterable(to_words(encode32(x)) for x in unpack32(src))
@@ -1,13 +1,46 @@
+import io
 import os
+import stat
+import time
 import urllib3
-import json
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
 
 from .archive_id import Document
+from .jsonstream import stream_member
+
+DEFAULT_CONCURRENCY = 4
+PUSH_RETRIES = 3
+# Seconds before the first retry of an upload, doubling with every attempt.
+PUSH_BACKOFF = 1.0
+# The largest page size paperless accepts (max_page_size of its pagination).
+MAX_PAGE_SIZE = 100000
+
+class PaperlessError(Exception):
+    def __init__(self, message, response):
+        self.message = message
+        self.response = response
+
+    def __str__(self):
+        return f'{self.message}: {self.response.status} {self.response.data[:200]!r}'
+
+    def retryable(self):
+        return self.response.status == 429 or self.response.status >= 500
 
-def pool_manager():
+def paperless_concurrency():
+    return int(os.getenv('PAPERLESS_CONCURRENCY', DEFAULT_CONCURRENCY))
+
+def paperless_page_size():
+    return int(os.getenv('PAPERLESS_PAGE_SIZE', MAX_PAGE_SIZE))
+
+def pool_manager(maxsize=None):
     paperless_cert = os.getenv('PAPERLESS_CERT')
     paperless_cert_key = os.getenv('PAPERLESS_CERT_KEY')
-    return urllib3.PoolManager(cert_file = paperless_cert, key_password = paperless_cert_key)
+    return urllib3.PoolManager(cert_file = paperless_cert, key_password = paperless_cert_key,
+                               maxsize = maxsize or paperless_concurrency())
 
 def authorization_header():
     token = os.getenv('PAPERLESS_TOKEN')
@@ -16,30 +49,219 @@ def authorization_header():
 def paperless_endpoint():
     return os.getenv('PAPERLESS_ENDPOINT')
 
-def stream_paginated(http, method, url, **kwargs):
-    next_page_url = url
-    while True:
-        page = json.loads(http.request(method, next_page_url, **kwargs).data.decode('utf-8'))
-        yield page
-        if not page['next']:
-            return
-        next_page_url = urllib3.util.parse_url(page['next'])._replace(scheme = 'https').url
-
-def document_ids():
-    with pool_manager() as http:
-        for docs in stream_paginated(http, 'GET', f'{paperless_endpoint()}/api/documents/',
-                                     fields = { 'archive_serial_number__isnull': 'false', 'ordering': 'archive_serial_number' },
-                                     headers = authorization_header()):
-            for x in docs['results']:
-                yield x['archive_serial_number']
+# Responses are read in chunks of this size and parsed as they arrive.
+STREAM_CHUNK = 1 << 16
+
+def stream_results(http, method, url, page, skip=('all',), **kwargs):
+    """Request a result page and yield its results as they are parsed.
+
+    The other members of the response, such as count and next, are stored
+    in page, except those named in skip; by default that is the list of
+    all ids paperless includes.
+    """
+    response = http.request(method, url, preload_content = False, **kwargs)
+    try:
+        if response.status != 200:
+            raise PaperlessError('Unexpected HTTP status for result page', response)
+        yield from stream_member(response.stream(STREAM_CHUNK), 'results', page, skip = skip)
+    finally:
+        response.release_conn()
+
+def request_results(http, method, url, **kwargs):
+    return list(stream_results(http, method, url, {}, **kwargs))
+
+def page_url(url, next_url, page=None):
+    # Paperless reports its own scheme behind proxies; keep the one we used.
+    u = urllib3.util.parse_url(next_url)._replace(scheme = urllib3.util.parse_url(url).scheme)
+    if page is not None:
+        query = [q for q in (u.query or '').split('&') if q and not q.startswith('page=')]
+        u = u._replace(query = '&'.join(query + [f'page={page}']))
+    return u.url
+
+def stream_paginated(http, method, url, concurrency=1, **kwargs):
+    """Yield the results of a paginated paperless API response in order.
+
+    Results are parsed from the response body while it is received, so
+    the first ones are yielded before a page is complete. With
+    concurrency > 1 the first page is fetched alone to learn the result
+    count and page size; the remaining pages are then requested by up to
+    concurrency threads, at most 2 * concurrency pages ahead of the
+    consumer.
+    """
+    page = {}
+    page_size = 0
+    for x in stream_results(http, method, url, page, **kwargs):
+        page_size += 1
+        yield x
+    if not page.get('next'):
+        return
+
+    # The query of the next link already carries the request fields.
+    kwargs.pop('fields', None)
+
+    if concurrency <= 1:
+        while page.get('next'):
+            next_url = page_url(url, page['next'])
+            page = {}
+            yield from stream_results(http, method, next_url, page, **kwargs)
+        return
+
+    pages = -(-page['count'] // page_size)
+    urls = (page_url(url, page['next'], n) for n in range(2, pages + 1))
+    with ThreadPoolExecutor(concurrency) as pool:
+        pending = deque()
+        for u in urls:
+            pending.append(pool.submit(request_results, http, method, u, **kwargs))
+            if len(pending) >= 2 * concurrency:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def list_documents(fields=None, query=None, page_size=None, concurrency=None):
+    """Stream the documents matching query, as dicts.
+
+    fields restricts the returned document attributes, so paperless only
+    serializes and sends those.
+    """
+    concurrency = concurrency or paperless_concurrency()
+    params = dict(query or {})
+    params['page_size'] = str(page_size or paperless_page_size())
+    if fields:
+        params['fields'] = ','.join(fields)
+
+    with pool_manager(concurrency) as http:
+        yield from stream_paginated(http, 'GET', f'{paperless_endpoint()}/api/documents/',
+                                    concurrency = concurrency,
+                                    fields = params,
+                                    headers = authorization_header())
+
+def document_ids(concurrency=None):
+    for x in list_documents(fields = ['archive_serial_number'],
+                            query = { 'archive_serial_number__isnull': 'false', 'ordering': 'archive_serial_number' },
+                            concurrency = concurrency):
+        yield x['archive_serial_number']
+
+def document_summary(query=None, skip=('all',)):
+    """Request a single, one result page for query and return its other members."""
+    params = dict(query or {})
+    params.update(page_size = '1', fields = 'id')
+    page = {}
+    with pool_manager(1) as http:
+        for _ in stream_results(http, 'GET', f'{paperless_endpoint()}/api/documents/', page,
+                                skip = skip,
+                                fields = params,
+                                headers = authorization_header()):
+            pass
+    return page
+
+def document_count(query=None):
+    return document_summary(query)['count']
+
+def document_pks(query=None):
+    """The pks of all documents matching query, or None if paperless does
+    not list them (versions before the 'all' member of result pages)."""
+    return document_summary(query, skip = ()).get('all')
+
+@dataclass
+class PushResult:
+    doc: Document
+    attempts: int
+    error: Optional[Exception] = None
 
 def push_document(http, doc: Document):
     push(http, doc.data, f'{doc.id:010d}', f'{doc.id:010d}.pdf')
 
-def push(http, doc: bytes, title: str, filename: str):
-    http.request('POST', f'{paperless_endpoint()}/api/documents/post_document/',
-                 headers = authorization_header(),
-                 fields = {
-                     'title': title,
-                     'document': (filename, doc, 'application/pdf')
-                 })
+def data_size(data):
+    """Bytes left in data, or None if it is a stream of unknown length."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return memoryview(data).nbytes
+    try:
+        st = os.fstat(data.fileno())
+        if stat.S_ISREG(st.st_mode):
+            return st.st_size - data.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    return None
+
+def data_chunks(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data).cast('B')
+        for i in range(0, len(view), STREAM_CHUNK):
+            yield bytes(view[i:i + STREAM_CHUNK])
+    else:
+        while chunk := data.read(STREAM_CHUNK):
+            yield chunk
+
+def multipart_body(fields, name, filename, data, content_type):
+    """Encode form fields and one file as multipart/form-data, in chunks.
+
+    Returns (content type, body chunks, body length); the length is None
+    if the size of data is not known up front.
+    """
+    boundary = urllib3.filepost.choose_boundary()
+    param = urllib3.fields.format_header_param_html5
+    head = ''.join(f'--{boundary}\r\nContent-Disposition: form-data; {param("name", k)}\r\n\r\n{v}\r\n'
+                   for (k, v) in fields.items())
+    head += (f'--{boundary}\r\nContent-Disposition: form-data; {param("name", name)}; {param("filename", filename)}\r\n'
+             f'Content-Type: {content_type}\r\n\r\n')
+    head = head.encode('utf-8')
+    tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+    def chunks():
+        yield head
+        yield from data_chunks(data)
+        yield tail
+
+    size = data_size(data)
+    length = len(head) + size + len(tail) if size is not None else None
+    return (f'multipart/form-data; boundary={boundary}', chunks(), length)
+
+def push(http, doc, title: str, filename: str):
+    """Upload doc, given as bytes or a binary file object, in chunks.
+
+    The body is sent with a Content-Length when the size of doc is known
+    and with chunked transfer encoding otherwise, so doc is never copied
+    into memory as a whole.
+    """
+    (content_type, body, length) = multipart_body({ 'title': title }, 'document', filename, doc, 'application/pdf')
+    headers = { **authorization_header(), 'Content-Type': content_type }
+    if length is not None:
+        headers['Content-Length'] = str(length)
+    # A partly consumed body can not be replayed; push_with_retries retries
+    # with a fresh one.
+    r = http.urlopen('POST', f'{paperless_endpoint()}/api/documents/post_document/',
+                     headers = headers,
+                     body = body,
+                     chunked = length is None,
+                     retries = False)
+    if r.status >= 300:
+        raise PaperlessError('Document upload failed', r)
+
+def push_with_retries(http, doc: Document, retries=PUSH_RETRIES, backoff=PUSH_BACKOFF):
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            push_document(http, doc)
+            return PushResult(doc, attempt)
+        except (PaperlessError, urllib3.exceptions.HTTPError) as e:
+            if attempt > retries or (isinstance(e, PaperlessError) and not e.retryable()):
+                return PushResult(doc, attempt, e)
+            time.sleep(backoff * 2**(attempt - 1))
+
+def push_documents(http, docs, concurrency=None, retries=PUSH_RETRIES, backoff=PUSH_BACKOFF):
+    """Upload docs as they are produced, yielding a PushResult for each in order.
+
+    Up to concurrency uploads run at once, and at most 2 * concurrency
+    documents are held waiting for an upload slot, so producing docs is
+    only throttled when uploading falls behind.
+    """
+    concurrency = concurrency or paperless_concurrency()
+    with ThreadPoolExecutor(concurrency) as pool:
+        pending = deque()
+        for doc in docs:
+            pending.append(pool.submit(push_with_retries, http, doc, retries, backoff))
+            while pending and (pending[0].done() or len(pending) >= 2 * concurrency):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,6 +1,14 @@
-from .archive_id import box_id_bytes, folder_id_bytes
+from .archive_id import box_ids, folder_ids, bucket_ids
 from dataclasses import dataclass
 from blake3 import blake3
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import contextlib
+
+import math
+import numpy as np
+import struct
 
 @dataclass(frozen=True, order=True)
 class Box:
@@ -16,32 +24,221 @@ class Folder:
     def __repr__(self):
         return f'Folder({self.id.hex()})'
 
+@dataclass(frozen=True, order=True)
+class Bucket:
+    id: bytes
+    boxes: tuple
+    weight: float
+
+    def __repr__(self):
+        return f'Bucket({self.id.hex()}, {len(self.boxes)} boxes)'
+
 class ArchiveMap:
     def __init__(self):
         self.boxes = []
         self.folders = []
+        # Capacity weight per box; None keeps the unweighted selection.
+        self.box_weights = None
+        # Groups of boxes selected first when placing a folder, or None.
+        self.buckets = None
+        self._prefix_hashers = {}
+        self._folder_boxes = None
+        self._box_folders = None
+
+    def __getstate__(self):
+        # Hashers can't be pickled; workers rebuild the cache on demand.
+        state = self.__dict__.copy()
+        state['_prefix_hashers'] = {}
+        return state
+
+    def fingerprint(self):
+        """Identify the map by its archive key and dimensions.
+
+        Box and folder ids are derived from the key, so hashing them (along
+        with their counts) changes whenever either does.
+        """
+        h = blake3(struct.pack('<II', len(self.boxes), len(self.folders)))
+        for x in self.boxes + self.folders:
+            h.update(x.id)
+        if self.box_weights is not None:
+            for box in self.boxes:
+                h.update(struct.pack('<d', self.box_weight(box)))
+        if self.buckets is not None:
+            for bucket in self.buckets:
+                h.update(bucket.id + b''.join(box.id for box in bucket.boxes))
+        return h.digest()
+
+    def box_weight(self, box):
+        return self.box_weights.get(box, 1.0) if self.box_weights is not None else 1.0
+
+    # The reverse mappings below are built on first use and cached; the map
+    # must not be changed once they have been queried.
+
+    def folder_box(self, folder):
+        if self._folder_boxes is None:
+            self._folder_boxes = {f: compute_folder_placement(self, f) for f in self.folders}
+        box = self._folder_boxes.get(folder)
+        return box if box is not None else compute_folder_placement(self, folder)
+
+    def box_folders(self, box):
+        if self._box_folders is None:
+            self._box_folders = {b: [] for b in self.boxes}
+            for f in self.folders:
+                self._box_folders[self.folder_box(f)].append(f)
+        return list(self._box_folders.get(box, []))
+
+    def prefix_hasher(self, x):
+        """Return a blake3 hasher that has already absorbed x.id.
+
+        Straw weights hash a box or folder id followed by a suffix; the
+        prefix state is prepared once and copied for every weight.
+        """
+        h = self._prefix_hashers.get(x.id)
+        if h is None:
+            h = self._prefix_hashers[x.id] = blake3(x.id)
+        return h
+
+    def straw_weight(self, x, suffix):
+        h = self.prefix_hasher(x).copy()
+        h.update(suffix)
+        return int.from_bytes(h.digest(8), byteorder='little')
+
+    def box_straw_weight(self, box, folder):
+        return self.straw_weight(box, folder.id)
+
+    def folder_straw_weight(self, folder, doc_id):
+        return self.straw_weight(folder, document_suffix(doc_id))
 
-    def new(*, boxes=3, folders=50, key = b''):
+    def new(*, boxes=3, folders=50, key = b'', box_weights=None, bucket_size=None):
+        """Create the map of boxes 1..boxes and folders 1..folders.
+
+        box_weights lists a capacity weight per box number and switches
+        folder placement to weighted straw2 selection. bucket_size groups
+        consecutive box numbers into buckets, so a folder first picks a
+        bucket and then a box within it; with buckets of about sqrt(boxes)
+        placing a folder hashes O(sqrt(boxes)) straws instead of O(boxes).
+        Without either the map places folders exactly as before.
+        """
         a = ArchiveMap()
-        a.boxes = list(sorted(
-            Box(box_id_bytes(str(i).encode('utf-8'), key=key)) for i in range(1,boxes+1)
-        ))
-        a.folders = list(sorted(
-            Folder(folder_id_bytes(str(i).encode('utf-8'), key=key)) for i in range(1,folders+1)
-        ))
+        numbered = list(map(Box, box_ids(key).numbered(1, boxes+1)))
+        a.boxes = list(sorted(numbered))
+        a.folders = list(sorted(map(Folder, folder_ids(key).numbered(1, folders+1))))
+
+        if box_weights is not None:
+            if len(box_weights) != boxes:
+                raise ValueError(f'Expected {boxes} box weights, got {len(box_weights)}')
+            if any(w < 0 for w in box_weights):
+                raise ValueError('Box weights must not be negative')
+            a.box_weights = dict(zip(numbered, map(float, box_weights)))
+
+        if bucket_size is not None:
+            if bucket_size < 1:
+                raise ValueError('Bucket size must be positive')
+            members = [tuple(numbered[i:i+bucket_size]) for i in range(0, boxes, bucket_size)]
+            a.buckets = list(sorted(
+                Bucket(id, bs, sum(a.box_weight(b) for b in bs))
+                for (id, bs) in zip(bucket_ids(key).numbered(1, len(members)+1), members)
+            ))
+
         return a
 
+def straw_select(candidates, weight):
+    """Return the candidate with the smallest straw weight.
+
+    Candidates are scanned once, keeping only the running minimum. Equal
+    weights are resolved in favour of the candidate with the smaller raw id
+    bytes, which is the same order the dataclasses compare in.
+    """
+    best = None
+    best_weight = None
+    for c in candidates:
+        w = weight(c)
+        if best is None or w < best_weight or (w == best_weight and c.id < best.id):
+            best = c
+            best_weight = w
+    return best
+
 def compute_box_folders(archive_map, box):
-    return list(filter(lambda f: compute_folder_placement(archive_map, f) == box, archive_map.folders))
+    return archive_map.box_folders(box)
 
 def box_straw_weight(box, folder):
     return int.from_bytes(blake3(box.id + folder.id).digest(length=8), byteorder='little')
 
+def straw2_cost(straw, weight):
+    """Turn a 64 bit straw into an exponentially distributed draw with rate weight.
+
+    The candidate with the smallest draw wins with probability proportional
+    to its weight, and changing one weight only moves items to or from that
+    candidate. For equal weights the order matches the raw straws.
+    """
+    if weight <= 0:
+        return math.inf
+    return -math.log((2**64 - straw) / 2**64) / weight
+
 def compute_folder_placement(archive_map, folder):
-    return sorted((box_straw_weight(box, folder), box) for box in archive_map.boxes)[0][1]
+    if archive_map.box_weights is None and archive_map.buckets is None:
+        return straw_select(archive_map.boxes, lambda box: archive_map.box_straw_weight(box, folder))
+
+    boxes = archive_map.boxes
+    if archive_map.buckets is not None:
+        boxes = straw_select(archive_map.buckets,
+                             lambda bucket: straw2_cost(archive_map.straw_weight(bucket, folder.id), bucket.weight)).boxes
+    return straw_select(boxes,
+                        lambda box: straw2_cost(archive_map.box_straw_weight(box, folder), archive_map.box_weight(box)))
+
+def document_suffix(doc_id):
+    return f'{doc_id:010d}'.encode('utf-8')
 
 def folder_straw_weight(folder, doc_id):
     return int.from_bytes(blake3(folder.id + f'{doc_id:010d}'.encode('utf-8')).digest(length=8), byteorder='little')
 
 def compute_document_placement(archive_map, doc_id):
-    return sorted((folder_straw_weight(folder, doc_id), folder) for folder in archive_map.folders)[0][1]
+    suffix = document_suffix(doc_id)
+    return straw_select(archive_map.folders, lambda folder: archive_map.straw_weight(folder, suffix))
+
+# Number of documents whose straw weights are held in memory at once by
+# place_documents; bounds the weight matrix to PLACEMENT_CHUNK x folders.
+PLACEMENT_CHUNK = 1 << 16
+
+def folder_straw_weights(archive_map, folder, suffixes):
+    prefix = archive_map.prefix_hasher(folder)
+    def weight(suffix):
+        h = prefix.copy()
+        h.update(suffix)
+        return h.digest(8)
+    return np.frombuffer(b''.join(map(weight, suffixes)), dtype='<u8')
+
+# Below this many documents per job, starting worker processes costs more
+# than it saves.
+MIN_JOB_SIZE = 1 << 12
+
+def placement_pool(jobs):
+    """Context manager giving a process pool for place_documents, or None for jobs <= 1."""
+    return ProcessPoolExecutor(jobs) if jobs > 1 else contextlib.nullcontext()
+
+def place_documents(archive_map, doc_ids, jobs=1, pool=None):
+    """Compute the placement of many documents at once.
+
+    Returns an array of indices into archive_map.folders, one per doc_id.
+    np.argmin picks the first of several equal weights and the folders are
+    sorted, so ties resolve exactly like compute_document_placement.
+
+    With jobs > 1 the ids are split into contiguous shards that are placed
+    by a pool of worker processes; pass pool, see placement_pool, to reuse
+    one pool over many calls instead of starting a new one.
+    """
+    doc_ids = list(doc_ids)
+    jobs = min(jobs, len(doc_ids) // MIN_JOB_SIZE)
+    if jobs > 1:
+        shards = [doc_ids[i*len(doc_ids)//jobs:(i+1)*len(doc_ids)//jobs] for i in range(jobs)]
+        with (contextlib.nullcontext(pool) if pool is not None else ProcessPoolExecutor(jobs)) as pool:
+            return np.concatenate(list(pool.map(place_documents, repeat(archive_map), shards)))
+
+    out = np.empty(len(doc_ids), dtype=np.intp)
+    for start in range(0, len(doc_ids), PLACEMENT_CHUNK):
+        chunk = [document_suffix(doc_id) for doc_id in doc_ids[start:start+PLACEMENT_CHUNK]]
+        weights = np.empty((len(chunk), len(archive_map.folders)), dtype=np.uint64)
+        for j, folder in enumerate(archive_map.folders):
+            weights[:, j] = folder_straw_weights(archive_map, folder, chunk)
+        out[start:start+len(chunk)] = np.argmin(weights, axis=1)
+    return out
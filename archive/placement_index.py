@@ -0,0 +1,224 @@
+from .cache import cache_path
+from .placement import place_documents
+
+from contextlib import contextmanager
+
+import fcntl
+import numpy as np
+import os
+import struct
+import tempfile
+
+# On-disk layout, all little-endian:
+#
+#   header        magic, map fingerprint, folder count, box count,
+#                 slot capacity, number of stored documents
+#   folder_boxes  uint32 box index for every folder of the map
+#   slots         open addressing table of (doc_id, folder index) pairs
+#
+# The slot table is probed linearly starting at a Fibonacci hash of the
+# document id, so a lookup touches one or two slots and never hashes with
+# blake3.
+#
+# Changes are made under an exclusive flock on a separate lock file, as a
+# rebuild replaces the index file itself. A slot is filled by writing its
+# folder first and its doc id last, so readers and an interrupted insert
+# only ever see empty or complete slots.
+
+MAGIC = b'ARCHPIX1'
+HEADER = struct.Struct('<8s32sIIQQ')
+SLOT = np.dtype([('doc_id', '<u4'), ('folder', '<u4')])
+EMPTY = 0xffffffff
+MIN_CAPACITY = 1 << 10
+MAX_LOAD = 0.5
+
+def default_index_path():
+    return cache_path('placements.idx', env='ARCHIVE_PLACEMENT_INDEX')
+
+def slot_hash(doc_ids, capacity):
+    h = (np.asarray(doc_ids, dtype=np.uint64) * np.uint64(0x9e3779b1)) & np.uint64(0xffffffff)
+    return (h >> np.uint64(33 - capacity.bit_length())).astype(np.intp)
+
+def folder_boxes(archive_map):
+    boxes = {b: i for (i, b) in enumerate(archive_map.boxes)}
+    return np.array([boxes[archive_map.folder_box(f)] for f in archive_map.folders], dtype='<u4')
+
+@contextmanager
+def index_lock(path):
+    with open(path + '.lock', 'wb') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+def index_matches(path, archive_map):
+    """Whether the file at path is a complete index for archive_map."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+    except FileNotFoundError:
+        return False
+    if len(header) != HEADER.size:
+        return False
+    (magic, fingerprint, n_folders, n_boxes, capacity, _) = HEADER.unpack(header)
+    return ((magic, fingerprint) == (MAGIC, archive_map.fingerprint())
+            and n_folders == len(archive_map.folders) and n_boxes == len(archive_map.boxes)
+            and capacity >= MIN_CAPACITY and capacity & (capacity - 1) == 0
+            and size >= slots_offset(n_folders) + capacity * SLOT.itemsize)
+
+def map_index(path, archive_map):
+    """Map the index at path, rebuilding it if it is missing, truncated or
+    belongs to another map. Must be called with the index lock held.
+
+    Returns the memory map and the inode of the mapped file.
+    """
+    if not index_matches(path, archive_map):
+        write_index(path, archive_map, folder_boxes(archive_map), np.empty(0, dtype=SLOT), MIN_CAPACITY)
+    with open(path, 'r+b') as f:
+        return (np.memmap(f, mode='r+'), os.fstat(f.fileno()).st_ino)
+
+def capacity_for(count):
+    capacity = MIN_CAPACITY
+    while count > capacity * MAX_LOAD:
+        capacity *= 2
+    return capacity
+
+class PlacementIndex:
+    """Memory-mapped doc id -> folder index -> box index table for one ArchiveMap."""
+
+    def __init__(self, path, archive_map, mm, inode=None):
+        self.path = path
+        self.archive_map = archive_map
+        self._mm = mm
+        self.inode = inode
+        (_, _, n_folders, n_boxes, capacity, count) = HEADER.unpack_from(mm, 0)
+        self.capacity = capacity
+        self.count = count
+        self.folder_boxes = np.frombuffer(mm, dtype='<u4', count=n_folders, offset=HEADER.size)
+        self.slots = np.frombuffer(mm, dtype=SLOT, count=capacity, offset=slots_offset(n_folders))
+
+    @staticmethod
+    def open(archive_map, path=None):
+        """Open the index at path, rebuilding it if it is damaged or belongs to another map."""
+        path = path or default_index_path()
+        with index_lock(path):
+            return PlacementIndex(path, archive_map, *map_index(path, archive_map))
+
+    def reload(self):
+        """Pick up changes made by other processes, with the index lock held."""
+        if os.stat(self.path).st_ino != self.inode:
+            self.close()
+            self.__init__(self.path, self.archive_map, *map_index(self.path, self.archive_map))
+        # The stored count is not updated if an insert is interrupted.
+        self.count = int(np.count_nonzero(self.slots['doc_id'] != EMPTY))
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = self.slots = self.folder_boxes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, doc_ids):
+        """Return the folder index of every doc id, or -1 for unknown ids."""
+        ids = np.asarray(doc_ids, dtype=np.uint32)
+        mask = self.capacity - 1
+        slots = slot_hash(ids, self.capacity)
+        result = np.full(len(ids), -1, dtype=np.intp)
+        pending = np.arange(len(ids))
+        while len(pending):
+            entries = self.slots[slots[pending]]
+            found = entries['doc_id'] == ids[pending]
+            result[pending[found]] = entries['folder'][found]
+            pending = pending[~found & (entries['doc_id'] != EMPTY)]
+            slots[pending] = (slots[pending] + 1) & mask
+        return result
+
+    def box_folders(self, box):
+        if box not in self.archive_map.boxes:
+            return []
+        i = self.archive_map.boxes.index(box)
+        return [f for (f, b) in zip(self.archive_map.folders, self.folder_boxes) if b == i]
+
+    def update(self, doc_ids, jobs=1, pool=None):
+        """Place and insert every doc id not yet in the index.
+
+        Returns the folder index of every given doc id.
+        """
+        ids = np.fromiter(doc_ids, dtype=np.int64)
+        if len(ids) and (ids.min() < 0 or ids.max() >= EMPTY):
+            raise ValueError('Document IDs must fit into 32 bits')
+
+        result = self.lookup(ids)
+        missing = np.unique(ids[result < 0])
+        if not len(missing):
+            return result
+
+        # Placing is the slow part and needs no lock; another process may
+        # insert some of the same documents meanwhile.
+        placed = place_documents(self.archive_map, missing.tolist(), jobs=jobs, pool=pool)
+        with index_lock(self.path):
+            self.reload()
+            new = self.lookup(missing) < 0
+            (missing, placed) = (missing[new], placed[new])
+            capacity = capacity_for(self.count + len(missing))
+            if capacity != self.capacity:
+                self.grow(capacity, missing, placed)
+            elif len(missing):
+                self.insert(missing, placed)
+                self.count += len(missing)
+                HEADER.pack_into(self._mm, 0, MAGIC, self.archive_map.fingerprint(),
+                                 len(self.folder_boxes), len(self.archive_map.boxes), self.capacity, self.count)
+                self._mm.flush()
+
+        return self.lookup(ids)
+
+    def insert(self, doc_ids, folders):
+        mask = self.capacity - 1
+        slot_ids = self.slots['doc_id']
+        slot_folders = self.slots['folder']
+        for (doc_id, folder, slot) in zip(doc_ids.tolist(), folders.tolist(), slot_hash(doc_ids, self.capacity).tolist()):
+            while slot_ids[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            slot_folders[slot] = folder
+            slot_ids[slot] = doc_id
+
+    def grow(self, capacity, doc_ids, folders):
+        # Called with the index lock held.
+        stored = self.slots[self.slots['doc_id'] != EMPTY]
+        entries = np.empty(len(stored) + len(doc_ids), dtype=SLOT)
+        entries[:len(stored)] = stored
+        entries['doc_id'][len(stored):] = doc_ids
+        entries['folder'][len(stored):] = folders
+        boxes = self.folder_boxes.copy()
+
+        self.close()
+        write_index(self.path, self.archive_map, boxes, entries, capacity)
+        self.__init__(self.path, self.archive_map, *map_index(self.path, self.archive_map))
+
+def slots_offset(n_folders):
+    return (HEADER.size + 4 * n_folders + SLOT.itemsize - 1) // SLOT.itemsize * SLOT.itemsize
+
+def write_index(path, archive_map, boxes, entries, capacity):
+    n_folders = len(archive_map.folders)
+    offset = slots_offset(n_folders)
+    # A unique temporary name, so concurrent rebuilds do not write into the
+    # same file; the last one to finish replaces the index.
+    (fd, tmp) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.truncate(offset + capacity * SLOT.itemsize)
+        mm = np.memmap(tmp, mode='r+')
+        HEADER.pack_into(mm, 0, MAGIC, archive_map.fingerprint(), n_folders, len(archive_map.boxes), capacity, len(entries))
+        mm[HEADER.size:HEADER.size + 4 * n_folders] = np.asarray(boxes, dtype='<u4').view(np.uint8)
+        index = PlacementIndex(tmp, archive_map, mm)
+        index.slots[:] = np.array((EMPTY, 0), dtype=SLOT)
+        index.insert(entries['doc_id'], entries['folder'])
+        index.close()
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
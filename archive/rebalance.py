@@ -0,0 +1,100 @@
+from .placement import Box, Folder, document_suffix, folder_straw_weights, place_documents
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+@dataclass(frozen=True)
+class FolderMove:
+    folder: Folder
+    old_box: Optional[Box]
+    new_box: Optional[Box]
+
+@dataclass(frozen=True)
+class DocumentMove:
+    doc_id: int
+    old_folder: Folder
+    old_box: Box
+    new_folder: Folder
+    new_box: Box
+
+def folder_moves(old, new):
+    """List the folders whose box differs between two maps.
+
+    Folders only present in one of the maps have None as the other box.
+    """
+    old_boxes = {f: old.folder_box(f) for f in old.folders}
+    new_boxes = {f: new.folder_box(f) for f in new.folders}
+    return [FolderMove(f, old_boxes.get(f), new_boxes.get(f))
+            for f in sorted(old_boxes.keys() | new_boxes.keys())
+            if old_boxes.get(f) != new_boxes.get(f)]
+
+def replace_placements(old, new, doc_ids, old_placement, jobs=1):
+    """Derive placements in new from known placements in old.
+
+    Documents whose folder still exists keep it unless one of the added
+    folders beats it, so only the current folder's straw and the straws of
+    the added folders are hashed. Documents in removed folders are placed
+    from scratch. Returns indices into new.folders.
+    """
+    new_index = {f: i for (i, f) in enumerate(new.folders)}
+    kept = np.array([new_index.get(f, -1) for f in old.folders], dtype=np.intp)
+    result = kept[old_placement] if len(old.folders) else np.full(len(doc_ids), -1, dtype=np.intp)
+
+    lost = result < 0
+    if lost.any():
+        result[lost] = place_documents(new, doc_ids[lost].tolist(), jobs=jobs)
+
+    old_folders = set(old.folders)
+    added = [i for (i, f) in enumerate(new.folders) if f not in old_folders]
+    stay = np.flatnonzero(~lost)
+    if not added or not len(stay):
+        return result
+
+    suffixes = [document_suffix(d) for d in doc_ids[stay].tolist()]
+    best = result[stay]
+    best_weight = np.empty(len(stay), dtype=np.uint64)
+    for i in np.unique(best):
+        rows = np.flatnonzero(best == i)
+        best_weight[rows] = folder_straw_weights(new, new.folders[i], [suffixes[r] for r in rows])
+
+    # Equal straws go to the smaller folder id, like np.argmin over the
+    # sorted folders in place_documents.
+    folder_ids = np.array([f.id for f in new.folders], dtype=object)
+    for i in added:
+        weight = folder_straw_weights(new, new.folders[i], suffixes)
+        wins = (weight < best_weight) | ((weight == best_weight) & (folder_ids[best] > new.folders[i].id))
+        best[wins] = i
+        best_weight[wins] = weight[wins]
+
+    result[stay] = best
+    return result
+
+def document_moves(old, new, doc_ids, old_placement=None, jobs=1):
+    """List the documents whose folder or box differs between two maps.
+
+    old_placement gives the known indices into old.folders for doc_ids
+    (e.g. from a PlacementIndex); it is computed if not given, by jobs
+    processes.
+    """
+    doc_ids = np.asarray(doc_ids, dtype=np.int64)
+    if old_placement is None:
+        old_placement = place_documents(old, doc_ids.tolist(), jobs=jobs)
+    old_placement = np.asarray(old_placement, dtype=np.intp)
+
+    if old.folders == new.folders:
+        new_placement = old_placement
+    else:
+        new_placement = replace_placements(old, new, doc_ids, old_placement, jobs)
+
+    old_boxes = [old.folder_box(f) for f in old.folders]
+    new_boxes = [new.folder_box(f) for f in new.folders]
+    # Number every (folder, box) location so the comparison stays on integers.
+    locations = {}
+    old_locations = np.array([locations.setdefault(l, len(locations)) for l in zip(old.folders, old_boxes)], dtype=np.intp)
+    new_locations = np.array([locations.setdefault(l, len(locations)) for l in zip(new.folders, new_boxes)], dtype=np.intp)
+
+    moved = np.flatnonzero(old_locations[old_placement] != new_locations[new_placement]) \
+        if len(doc_ids) else np.empty(0, dtype=np.intp)
+    return [DocumentMove(doc_id, old.folders[o], old_boxes[o], new.folders[n], new_boxes[n])
+            for (doc_id, o, n) in zip(doc_ids[moved].tolist(), old_placement[moved].tolist(), new_placement[moved].tolist())]
@@ -1,17 +1,24 @@
+import itertools
 import time
 import urllib3
 import xmltodict
+import struct
 import subprocess
 
 import logging
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
 from io import BytesIO
+from pikepdf import Dictionary, Name, Stream
 from pikepdf.models.image import PdfImage
+from PIL import Image
 from pikepdf._qpdf import Pdf
 from pyzbar import pyzbar
 
 from .archive_id import Document, new_archive_id
+from .escl import PollingWaiter
 
 logger = logging.getLogger("scan")
 
@@ -33,7 +40,36 @@ SOURCE_VAL = {
     'ADF': 'Feeder',
 }
 
-def build_scan_request_body(source, resolution):
+FORMAT_VAL = {
+    'pdf': 'application/pdf',
+    'jpeg': 'image/jpeg',
+}
+
+# How long to retry NextDocument while the scanner reports it is still busy
+# with the next page.
+NEXT_DOCUMENT_TIMEOUT = 120
+
+def document_formats(caps):
+    """All document formats listed anywhere in a capabilities subtree."""
+    formats = set()
+    if isinstance(caps, dict):
+        for (k, v) in caps.items():
+            if k.endswith(':DocumentFormat') or k.endswith(':DocumentFormatExt'):
+                formats.update(v if isinstance(v, list) else [v])
+            else:
+                formats |= document_formats(v)
+    elif isinstance(caps, list):
+        for v in caps:
+            formats |= document_formats(v)
+    return formats
+
+def choose_format(source_caps, scan_format):
+    """Scan page by page as JPEG if the scanner can, else as one PDF per job."""
+    if scan_format == 'auto':
+        scan_format = 'jpeg' if FORMAT_VAL['jpeg'] in document_formats(source_caps) else 'pdf'
+    return FORMAT_VAL[scan_format]
+
+def build_scan_request_body(source, resolution, document_format='application/pdf'):
     return \
         '<?xml version="1.0" encoding="UTF-8"?>' + \
         '<scan:ScanSettings xmln:pwg="http://www.pwg.org/schema/2010/12/sm" ' + \
@@ -46,50 +82,157 @@ def build_scan_request_body(source, resolution):
         '<pwg:XOffset>0</pwg:XOffset><pwg:YOffset>0</pwg:YOffset>' + \
         '<pwg:Width>2550</pwg:Width><pwg:Height>4200</pwg:Height>' + \
         '</pwg:ScanRegion></pwg:ScanRegions>' + \
-        '<pwg:DocumentFormat>application/pdf</pwg:DocumentFormat>' + \
-        '<scan:DocumentFormatExt>application/pdf</scan:DocumentFormatExt>' + \
+        f'<pwg:DocumentFormat>{document_format}</pwg:DocumentFormat>' + \
+        f'<scan:DocumentFormatExt>{document_format}</scan:DocumentFormatExt>' + \
         '<scan:ColorMode>RGB24</scan:ColorMode>' + \
         f'<scan:XResolution>{resolution}</scan:XResolution><scan:YResolution>{resolution}</scan:YResolution>' + \
         '</scan:ScanSettings>'
 
-def get_scanner_status(http):
-    r = http.request('GET', '/eSCL/ScannerStatus')
-    return xmltodict.parse(r.data)['scan:ScannerStatus']
-
-def wait_for_status(http, f):
-    status = get_scanner_status(http)
-    while not f(status):
-        time.sleep(1)
-        status = get_scanner_status(http)
+def wait_for_status(http, f, waiter=None):
+    return (waiter or PollingWaiter()).wait(http, f)
 
-def scan_pdf(http, source, resolution):
+def start_scan_job(http, source, resolution, document_format):
     r = http.request('POST', '/eSCL/ScanJobs',
                      headers = {
                         'Content-Type': 'text/xml'
                      },
-                     body = build_scan_request_body(SOURCE_VAL[source], resolution))
+                     body = build_scan_request_body(SOURCE_VAL[source], resolution, document_format))
     if r.status != 201:
         raise ScannerError("Unexpected HTTP status for scan request", r)
 
-    doc_location = urllib3.util.parse_url(r.info()["location"]).request_uri + '/NextDocument'
-    pdf_data = http.request('GET', doc_location).data
-
-    while http.request('GET', doc_location).status != 404:
-        logger.warning("We don't handle multiple documents per scan request.")
-
-    return pdf_data
+    return urllib3.util.parse_url(r.info()["location"]).request_uri
+
+def next_documents(http, job_uri):
+    """Yield the documents of a scan job as the scanner delivers them.
+
+    With an image format every document is one page. The job is done when
+    NextDocument answers 404; 503 means the next one is not ready yet.
+    """
+    doc_location = job_uri.rstrip('/') + '/NextDocument'
+    while True:
+        deadline = time.monotonic() + NEXT_DOCUMENT_TIMEOUT
+        delay = 0.05
+        while (r := http.request('GET', doc_location)).status == 503:
+            if time.monotonic() >= deadline:
+                raise ScannerError("Scanner did not deliver the next document", r)
+            time.sleep(delay)
+            delay = min(2 * delay, 1.0)
+
+        if r.status == 404:
+            return
+        if r.status != 200:
+            raise ScannerError("Unexpected HTTP status for next document", r)
+        yield r.data
+
+# JPEG start of frame markers; C4, C8 and CC are other segments.
+JPEG_SOF = set(range(0xc0, 0xd0)) - {0xc4, 0xc8, 0xcc}
+JPEG_COLORSPACE = {
+    1: Name.DeviceGray,
+    3: Name.DeviceRGB,
+    4: Name.DeviceCMYK,
+}
 
-def page_get_barcodes(page):
+def jpeg_size(data):
+    """(width, height, components) from the frame header of a JPEG image."""
+    if data[:2] != b'\xff\xd8':
+        raise ValueError('Not a JPEG image')
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xff:
+            raise ValueError('Corrupt JPEG image')
+        marker = data[i+1]
+        if marker == 0xff:
+            i += 1
+            continue
+        (length,) = struct.unpack_from('>H', data, i + 2)
+        if marker in JPEG_SOF:
+            (height, width, components) = struct.unpack_from('>HHB', data, i + 5)
+            return (width, height, components)
+        i += 2 + length
+    raise ValueError('JPEG image without frame header')
+
+def jpeg_to_pdf(data, resolution):
+    """A one page Pdf showing the JPEG image data, embedded as is."""
+    (width, height, components) = jpeg_size(data)
+    pdf = Pdf.new()
+    # The stream data is the JPEG file itself, which is what DCTDecode reads.
+    image = Stream(pdf, data)
+    image.Type = Name.XObject
+    image.Subtype = Name.Image
+    image.Width = width
+    image.Height = height
+    image.ColorSpace = JPEG_COLORSPACE[components]
+    image.BitsPerComponent = 8
+    image.Filter = Name.DCTDecode
+    (w, h) = (width * 72 / resolution, height * 72 / resolution)
+    page = pdf.add_blank_page(page_size = (w, h))
+    page.Resources = Dictionary(XObject = Dictionary(Im0 = image))
+    page.Contents = Stream(pdf, f'q {w:.4f} 0 0 {h:.4f} 0 0 cm /Im0 Do Q'.encode('ascii'))
+    return pdf
+
+def scan_pass(http, source, resolution, document_format):
+    """Run one scan job, yielding a Pdf for every document as it arrives.
+
+    Image formats give one Pdf per page, PDF scans one per document the
+    scanner splits the job into.
+    """
+    job_uri = start_scan_job(http, source, resolution, document_format)
+    for data in next_documents(http, job_uri):
+        if document_format == FORMAT_VAL['pdf']:
+            yield Pdf.open(BytesIO(data))
+        else:
+            yield jpeg_to_pdf(data, int(resolution))
+
+def barcode_image(img, region=None, scale=1.0):
+    """Grayscale PIL image of a PDF image for barcode detection.
+
+    region is a (left, top, right, bottom) box in fractions of the image
+    to crop to, scale the factor to shrink it by. JPEG images are decoded
+    at reduced size directly, skipping most of the decoding work.
+    """
+    if img.get('/Filter') == Name.DCTDecode:
+        pil = Image.open(BytesIO(img.read_raw_bytes()))
+        full_width = pil.width
+        if scale < 1:
+            pil.draft('L', (round(pil.width * scale), round(pil.height * scale)))
+    else:
+        pil = PdfImage(img).as_pil_image()
+        full_width = pil.width
+    pil = pil.convert('L')
+
+    (w, h) = pil.size
+    if region is not None:
+        (left, top, right, bottom) = region
+        pil = pil.crop((round(left * w), round(top * h), round(right * w), round(bottom * h)))
+    # draft only shrinks by powers of two and never below the requested size.
+    shrink = scale * full_width / w
+    if shrink < 1:
+        pil = pil.resize((max(1, round(pil.width * shrink)), max(1, round(pil.height * shrink))), Image.BILINEAR)
+    return pil
+
+def page_get_barcodes(page, region=None, scale=1.0, fallback=True):
+    """Decode the barcodes on a page.
+
+    Each image is first searched shrunk by scale and cropped to region;
+    with fallback, images where nothing was found are searched again at
+    full resolution, still within region.
+    """
     out = []
     for img in page.images.values():
-        for barcode in pyzbar.decode(PdfImage(img).as_pil_image()):
+        barcodes = pyzbar.decode(barcode_image(img, region, scale))
+        if not barcodes and fallback and scale < 1:
+            barcodes = pyzbar.decode(barcode_image(img, region))
+        for barcode in barcodes:
             code = barcode.data.decode("utf-8")
             logger.debug(code)
             out.append(code)
     return out
 
+def opts_barcodes(page, opts):
+    return page_get_barcodes(page, opts.barcode_region, opts.barcode_scale, opts.barcode_fallback)
+
 def page_contains_separator(page, opts):
-    codes = page_get_barcodes(page)
+    codes = opts_barcodes(page, opts)
     return opts.document_separator in codes
 
 class PageClassification(Enum):
@@ -97,7 +240,7 @@ class PageClassification(Enum):
     NEXT_DOCUMENT_SIMPLEX = auto()
 
 def classify_page(page, opts):
-    codes = page_get_barcodes(page)
+    codes = opts_barcodes(page, opts)
     classification = set()
 
     if opts.document_separator in codes:
@@ -108,6 +251,35 @@ def classify_page(page, opts):
 
     return classification
 
+def classify_pages(pages, opts):
+    return [classify_page(page, opts) for page in pages]
+
+def submit_classification(docs, opts, pool):
+    """Classify the pages of each scanned Pdf in pool as soon as it arrives.
+
+    Yields (pdf, pages, future classifications); the pages of a Pdf must
+    not be used before its classifications are done.
+    """
+    for pdf in docs:
+        pages = list(pdf.pages)
+        yield (pdf, pages, pool.submit(classify_pages, pages, opts))
+
+def classified_pages(submitted, ahead=0):
+    """Yield (page, classification) in order from submit_classification.
+
+    Up to ahead Pdfs are retrieved while the classification of earlier ones
+    is still running.
+    """
+    pending = deque()
+    for s in submitted:
+        pending.append(s)
+        while pending and (pending[0][2].done() or len(pending) > ahead):
+            (pdf, pages, classifications) = pending.popleft()
+            yield from zip(pages, classifications.result())
+    while pending:
+        (pdf, pages, classifications) = pending.popleft()
+        yield from zip(pages, classifications.result())
+
 def pdf_to_bytes(pdf):
     bytes = BytesIO()
     pdf.save(bytes)
@@ -116,21 +288,19 @@ def pdf_to_bytes(pdf):
 def new_doc(doc_data):
     return Document(data = doc_data, id = new_archive_id(doc_data))
 
-def interleave_front_back(front_data, back_data, opts):
-    docs = []
+def interleave_front_back(front, back_pages, opts):
+    """Split the scanned pages into documents, yielding each once it is complete.
 
+    front yields (page, classification) for the front pages in scan order,
+    see classified_pages; back_pages are the back pages in scan order, or
+    None for a simplex scan.
+    """
     dst = Pdf.new()
-    front = Pdf.open(BytesIO(front_data))
-
-    if back_data:
-        back = Pdf.open(BytesIO(back_data))
-    else:
-        back = None
+    back = reversed(back_pages) if back_pages else itertools.repeat(None)
 
     do_duplex = opts.duplex
 
-    for (front, back) in zip(front.pages, reversed(back.pages) if back else (None for _ in front.pages)):
-        classification = classify_page(front, opts)
+    for ((front, classification), back) in zip(front, back):
         if not classification:
             dst.pages.append(front)
             if do_duplex and back:
@@ -139,16 +309,14 @@ def interleave_front_back(front_data, back_data, opts):
             if PageClassification.DOCUMENT_SEPARATOR in classification:
                 do_duplex = opts.duplex
                 if len(dst.pages) > 0:
-                    docs.append(new_doc(pdf_to_bytes(dst)))
+                    yield new_doc(pdf_to_bytes(dst))
                     dst.close()
                     dst = Pdf.new()
             if PageClassification.NEXT_DOCUMENT_SIMPLEX in classification:
                 do_duplex = False
 
     if len(dst.pages) > 0:
-        docs.append(new_doc(pdf_to_bytes(dst)))
-
-    return docs
+        yield new_doc(pdf_to_bytes(dst))
 
 def yes_or_no(q):
     try:
@@ -161,20 +329,28 @@ def yes_or_no(q):
     except EOFError:
         return False
 
-def scan_pdf_flatbed(http, scanner_dpi):
+def scan_pdf_flatbed(http, scanner_dpi, document_format, waiter=None):
     dst = Pdf.new()
     while yes_or_no("Scan page?"):
-        wait_for_status(http, lambda status: status["pwg:State"] == "Idle")
-        next = Pdf.open(BytesIO(scan_pdf(http, "Flatbed", scanner_dpi)))
-        for p in next.pages:
-            dst.pages.append(p)
+        wait_for_status(http, lambda status: status["pwg:State"] == "Idle", waiter)
+        for next in scan_pass(http, "Flatbed", scanner_dpi, document_format):
+            for p in next.pages:
+                dst.pages.append(p)
 
     return new_doc(pdf_to_bytes(dst))
 
 def scan_documents(opts):
+    """Scan and yield documents as soon as their last page is classified.
+
+    Simplex ADF documents are yielded while the feeder is still running.
+    In duplex mode the front pages are classified while the stack is
+    flipped and the back pass is scanned.
+    """
     def status_check(status):
         return status["pwg:State"] == "Idle" and (status["scan:AdfState"] == "ScannerAdfLoaded" if opts.scanner_source == "ADF" else True)
 
+    waiter = PollingWaiter(timeout = opts.scanner_timeout)
+
     with urllib3.HTTPSConnectionPool(opts.scanner_host, cert_reqs='CERT_NONE', assert_fingerprint = opts.scanner_https_fingerprint) as http:
         caps = get_scanner_caps(http)
         SOURCE_CAPS_VAL = {
@@ -183,17 +359,22 @@ def scan_documents(opts):
         }
         if SOURCE_CAPS_VAL[opts.scanner_source] not in caps:
             raise ValueError(f'Scanner does not support source type "{opts.scanner_source}"')
+        document_format = choose_format(caps[SOURCE_CAPS_VAL[opts.scanner_source]], opts.scan_format)
 
         if opts.scanner_source == "Flatbed":
-            return [scan_pdf_flatbed(http, opts.scanner_dpi)]
-
-        wait_for_status(http, status_check)
-        front_data = scan_pdf(http, opts.scanner_source, opts.scanner_dpi)
-        if opts.duplex:
-            wait_for_status(http, status_check)
-            back_data = scan_pdf(http, opts.scanner_source, opts.scanner_dpi)
-        else:
-            back_data = None
-
-    return interleave_front_back(front_data, back_data, opts)
-
+            yield scan_pdf_flatbed(http, opts.scanner_dpi, document_format, waiter)
+            return
+
+        with ThreadPoolExecutor(1) as pool:
+            wait_for_status(http, status_check, waiter)
+            front = submit_classification(scan_pass(http, opts.scanner_source, opts.scanner_dpi, document_format), opts, pool)
+            if not opts.duplex:
+                yield from interleave_front_back(classified_pages(front, ahead = 4), None, opts)
+                return
+
+            front = list(front)
+            wait_for_status(http, status_check, waiter)
+            back = list(scan_pass(http, opts.scanner_source, opts.scanner_dpi, document_format))
+            back_pages = [p for pdf in back for p in pdf.pages]
+
+            yield from interleave_front_back(classified_pages(front), back_pages, opts)
@@ -0,0 +1,95 @@
+# Cost of barcode detection per scanned page.
+#
+# Run from the repository root:
+#
+#   python -m bench.barcodes
+#
+# Synthetic A4 pages are scanned at --dpi: a separator page with a Code 39
+# barcode in its top part and a page of text-like noise without one. Real
+# scans can be given with --separator and --page (JPEG files). Each row
+# shows the time per page and the codes found, for full resolution
+# detection as done before and for the downscaled and cropped variants of
+# page_get_barcodes.
+
+from archive.scan import jpeg_to_pdf, page_get_barcodes
+
+from io import BytesIO
+from pikepdf.models.image import PdfImage
+from PIL import Image, ImageDraw
+from pyzbar import pyzbar
+
+import argparse
+import random
+import timeit
+
+CODE39 = {
+    '0': '000110100', '1': '100100001', '2': '001100001', '3': '101100000',
+    '4': '000110001', '5': '100110000', '6': '001110000', '7': '000100101',
+    '8': '100100100', '9': '001100100', '*': '010010100',
+}
+
+def draw_code39(draw, text, x, y, narrow, height):
+    for c in f'*{text}*':
+        for (i, wide) in enumerate(CODE39[c]):
+            w = narrow * 5 // 2 if wide == '1' else narrow
+            if i % 2 == 0:
+                draw.rectangle((x, y, x + w - 1, y + height), fill=0)
+            x += w
+        x += narrow
+
+def synthetic_page(dpi, code=None, seed=0):
+    rng = random.Random(seed)
+    (w, h) = (round(8.27 * dpi), round(11.69 * dpi))
+    img = Image.new('RGB', (w, h), 'white')
+    draw = ImageDraw.Draw(img)
+    line = dpi // 6
+    for y in range(dpi, h - dpi, line):
+        x = dpi
+        while x < w - dpi:
+            word = rng.randrange(dpi // 10, dpi // 2)
+            draw.rectangle((x, y, min(x + word, w - dpi), y + line // 2), fill=rng.randrange(0, 100))
+            x += word + dpi // 12
+    if code:
+        draw.rectangle((dpi // 2, dpi // 2, w - dpi // 2, 3 * dpi), fill='white')
+        draw_code39(draw, code, dpi, dpi, max(2, dpi // 50), dpi)
+    out = BytesIO()
+    img.save(out, 'JPEG', quality=85)
+    return out.getvalue()
+
+def full_resolution(page):
+    return [b.data.decode('utf-8') for img in page.images.values() for b in pyzbar.decode(PdfImage(img).as_pil_image())]
+
+def main():
+    p = argparse.ArgumentParser(description='Benchmark barcode detection on scanned pages')
+    p.add_argument('--dpi', type=int, default=300)
+    p.add_argument('--separator', type=argparse.FileType('rb'), help='JPEG scan of a separator page')
+    p.add_argument('--page', type=argparse.FileType('rb'), help='JPEG scan of a page without barcodes')
+    p.add_argument('--region', type=float, nargs=4, default=[0, 0, 1, 0.3])
+    p.add_argument('--scale', type=float, default=0.5)
+    p.add_argument('--repeat', type=int, default=3)
+    opts = p.parse_args()
+
+    pages = [
+        ('separator', opts.separator.read() if opts.separator else synthetic_page(opts.dpi, '0123456789')),
+        ('plain', opts.page.read() if opts.page else synthetic_page(opts.dpi)),
+    ]
+    region = tuple(opts.region)
+    methods = [
+        ('full', full_resolution),
+        ('scaled', lambda page: page_get_barcodes(page, None, opts.scale)),
+        ('scaled, no fallback', lambda page: page_get_barcodes(page, None, opts.scale, fallback=False)),
+        ('region', lambda page: page_get_barcodes(page, region, opts.scale)),
+        ('region, no fallback', lambda page: page_get_barcodes(page, region, opts.scale, fallback=False)),
+    ]
+
+    print(f'{"":>10} {"":>20} {"time":>10}  codes')
+    for (kind, data) in pages:
+        pdf = jpeg_to_pdf(data, opts.dpi)
+        page = pdf.pages[0]
+        for (label, detect) in methods:
+            codes = detect(page)
+            t = min(timeit.repeat(lambda: detect(page), repeat=opts.repeat, number=1))
+            print(f'{kind:>10} {label:>20} {t*1e3:8.1f}ms  {codes}')
+
+if __name__ == '__main__':
+    main()
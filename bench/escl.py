@@ -0,0 +1,117 @@
+# Latency of waiting for an eSCL scanner against a local fake scanner.
+#
+# Run from the repository root:
+#
+#   python -m bench.escl
+#
+# The fake scanner reports Processing for a given busy time and Idle
+# afterwards. For each waiter and busy time the table shows how long after
+# the scanner became idle the wait returned, and how many status requests
+# and connections it took. A second table compares parsing the status
+# document with xmltodict against the state extraction used by the waiters.
+
+from archive.escl import PollingWaiter, FixedWaiter, parse_scanner_status
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import argparse
+import threading
+import time
+import timeit
+import urllib3
+
+STATUS = '''<?xml version="1.0" encoding="UTF-8"?>
+<scan:ScannerStatus xmlns:scan="http://schema.hp.com/imaging/escl/2011/05/03" xmlns:pwg="http://www.pwg.org/schema/2010/12/sm">
+  <pwg:Version>2.6</pwg:Version>
+  <pwg:State>{state}</pwg:State>
+  <scan:AdfState>ScannerAdfLoaded</scan:AdfState>
+  <scan:Jobs>
+    <scan:JobInfo>
+      <pwg:JobUri>/eSCL/ScanJobs/1</pwg:JobUri>
+      <pwg:JobUuid>00000000-0000-0000-0000-000000000001</pwg:JobUuid>
+      <scan:Age>3</scan:Age>
+      <pwg:ImagesCompleted>1</pwg:ImagesCompleted>
+      <pwg:ImagesToTransfer>0</pwg:ImagesToTransfer>
+      <pwg:JobState>{state}</pwg:JobState>
+      <pwg:JobStateReasons><pwg:JobStateReason>JobCompletedSuccessfully</pwg:JobStateReason></pwg:JobStateReasons>
+    </scan:JobInfo>
+  </scan:Jobs>
+</scan:ScannerStatus>
+'''
+
+class FakeScanner(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StatusHandler)
+        self.idle_at = 0.0
+        self.requests = 0
+        self.connections = 0
+
+    def busy(self, seconds):
+        self.idle_at = time.monotonic() + seconds
+        self.requests = 0
+        self.connections = 0
+
+class StatusHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one write, avoiding delayed ACK stalls.
+    wbufsize = 1 << 16
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests += 1
+        state = 'Idle' if time.monotonic() >= self.server.idle_at else 'Processing'
+        body = STATUS.format(state=state).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def measure(scanner, http, waiter, busy):
+    scanner.busy(busy)
+    waiter.wait(http, lambda status: status['pwg:State'] == 'Idle')
+    return (time.monotonic() - scanner.idle_at, scanner.requests, scanner.connections)
+
+def main():
+    p = argparse.ArgumentParser(description='Benchmark waiting for the scanner status')
+    p.add_argument('--busy', type=float, nargs='+', default=[0.0, 0.3, 2.5])
+    p.add_argument('--repeat', type=int, default=3)
+    opts = p.parse_args()
+
+    scanner = FakeScanner()
+    threading.Thread(target=scanner.serve_forever, daemon=True).start()
+
+    waiters = [
+        ('fixed 1s', FixedWaiter()),
+        ('adaptive', PollingWaiter()),
+    ]
+    print(f'{"":>10} {"busy":>6} {"latency":>10} {"requests":>9} {"conns":>6}')
+    with urllib3.HTTPConnectionPool('127.0.0.1', scanner.server_port, maxsize=1) as http:
+        for (label, waiter) in waiters:
+            for busy in opts.busy:
+                runs = [measure(scanner, http, waiter, busy) for _ in range(opts.repeat)]
+                (latency, requests, connections) = [sum(x) / len(runs) for x in zip(*runs)]
+                print(f'{label:>10} {busy:5.1f}s {latency*1e3:8.1f}ms {requests:9.1f} {connections:6.1f}')
+
+    print()
+    data = STATUS.format(state='Idle').encode('utf-8')
+    cases = [('regex', lambda: parse_scanner_status(data))]
+    try:
+        import xmltodict
+        cases.insert(0, ('xmltodict', lambda: xmltodict.parse(data)['scan:ScannerStatus']))
+    except ImportError:
+        pass
+    for (label, parse) in cases:
+        t = min(timeit.repeat(parse, repeat=5, number=1000)) / 1000
+        print(f'{label:>10} {t*1e6:10.1f}us')
+
+if __name__ == '__main__':
+    main()
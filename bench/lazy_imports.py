@@ -0,0 +1,27 @@
+# Check that the command line entry points import their heavy dependencies
+# lazily.
+#
+# Run from the repository root:
+#
+#   python -m bench.lazy_imports
+#
+# Imports archive.__main__ in a fresh interpreter and exits non-zero if
+# that loaded any of HEAVY_MODULES; only the subcommands using them may.
+
+import subprocess
+import sys
+
+HEAVY_MODULES = ('numpy', 'urllib3', 'blabel', 'weasyprint', 'pikepdf', 'pyzbar', 'xmltodict', 'PIL', 'sqlite3')
+
+def eager_imports(module='archive.__main__'):
+    code = f'import sys, {module}; print(" ".join(sorted(m for m in sys.modules if m.split(".")[0] in {HEAVY_MODULES!r})))'
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+
+def main():
+    loaded = eager_imports()
+    if loaded:
+        sys.exit(f'archive.__main__ eagerly imports {", ".join(loaded)}')
+    print('archive.__main__ imports no heavy modules')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Micro-benchmarks for the straw placement core.
+#
+# Run from the repository root:
+#
+#   python -m bench.placement
+#
+# Each row compares the previous sorted() based selection against
+# straw_select for the same map, both over the full placement call and over
+# the selection alone (with the straw weights precomputed). A second table
+# compares hashing each straw from scratch against copying the prepared
+# prefix hashers kept by ArchiveMap, per weight and per document placement.
+
+from archive.placement import ArchiveMap, straw_select, box_straw_weight, folder_straw_weight, compute_document_placement
+
+import argparse
+import random
+import timeit
+
+def sorted_select(candidates, weight):
+    return sorted((weight(c), c) for c in candidates)[0][1]
+
+def compare(label, candidates, weight, repeat, number):
+    weights = {c: weight(c) for c in candidates}
+    cases = [
+        ('full', weight),
+        ('select', weights.__getitem__),
+    ]
+    for (kind, w) in cases:
+        assert sorted_select(candidates, w) == straw_select(candidates, w)
+        old = min(timeit.repeat(lambda: sorted_select(candidates, w), repeat=repeat, number=number)) / number
+        new = min(timeit.repeat(lambda: straw_select(candidates, w), repeat=repeat, number=number)) / number
+        print(f'{label:>14} {kind:>6} {old*1e6:12.1f}us {new*1e6:12.1f}us {old/new:8.2f}x')
+
+def compare_weights(label, a, pairs, scratch, prepared, repeat, number):
+    assert [scratch(x, y) for (x, y) in pairs] == [prepared(x, y) for (x, y) in pairs]
+    old = min(timeit.repeat(lambda: [scratch(x, y) for (x, y) in pairs], repeat=repeat, number=number)) / number / len(pairs)
+    new = min(timeit.repeat(lambda: [prepared(x, y) for (x, y) in pairs], repeat=repeat, number=number)) / number / len(pairs)
+    print(f'{label:>14} {old*1e9:12.0f}ns {new*1e9:12.0f}ns {old/new:8.2f}x')
+
+def main():
+    p = argparse.ArgumentParser(description='Benchmark straw selection')
+    p.add_argument('--boxes', type=int, nargs='+', default=[3, 30, 300])
+    p.add_argument('--folders', type=int, nargs='+', default=[50, 500, 5000])
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--number', type=int, default=20)
+    opts = p.parse_args()
+
+    print(f'{"":>14} {"":>6} {"sorted":>14} {"straw_select":>14} {"speedup":>9}')
+
+    for n in opts.boxes:
+        a = ArchiveMap.new(boxes=n, folders=1, key=b'bench')
+        folder = a.folders[0]
+        compare(f'{n} boxes', a.boxes, lambda box: box_straw_weight(box, folder), opts.repeat, opts.number)
+
+    for n in opts.folders:
+        a = ArchiveMap.new(boxes=1, folders=n, key=b'bench')
+        doc_id = random.Random(n).randrange(2**31)
+        compare(f'{n} folders', a.folders, lambda folder: folder_straw_weight(folder, doc_id), opts.repeat, opts.number)
+
+    print()
+    print(f'{"":>14} {"scratch":>14} {"prefix copy":>14} {"speedup":>9}')
+
+    a = ArchiveMap.new(boxes=max(opts.boxes), folders=max(opts.folders), key=b'bench')
+    pairs = [(box, folder) for box in a.boxes for folder in a.folders[:100]]
+    compare_weights('box straw', a, pairs, box_straw_weight, a.box_straw_weight, opts.repeat, 1)
+    rng = random.Random(0)
+    pairs = [(folder, rng.randrange(2**31)) for folder in a.folders for _ in range(10)]
+    compare_weights('folder straw', a, pairs, folder_straw_weight, a.folder_straw_weight, opts.repeat, 1)
+
+    for n in opts.folders:
+        a = ArchiveMap.new(boxes=1, folders=n, key=b'bench')
+        pairs = [(a, rng.randrange(2**31)) for _ in range(max(10, 10000 // n))]
+        compare_weights(f'{n} placement', a, pairs,
+                        lambda a, doc_id: straw_select(a.folders, lambda folder: folder_straw_weight(folder, doc_id)),
+                        compute_document_placement, opts.repeat, 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# Timing suite for the placement and id hot paths.
+#
+# Run from the repository root:
+#
+#   python -m bench.suite [-k NAME] [--json FILE] [--baseline FILE]
+#
+# Each case prints the best of --repeat runs. Results saved with --json
+# can be passed as --baseline to a later run, which then reports every case
+# slower than the baseline by more than --tolerance and exits non-zero.
+
+from archive.archive_id import new_archive_id
+from archive.mnemonic.encode import encode, encode_many
+from archive.mnemonic.decode import decode
+from archive.placement import ArchiveMap, compute_folder_placement, compute_document_placement, compute_box_folders
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import timeit
+
+# Every benchmark takes its parameters and returns (setup, run): setup
+# builds fresh inputs before each repetition and returns them, run is the
+# timed call. Inputs come from a fixed seed and key, so the same case
+# measures the same work on every machine.
+
+KEY = b'archive benchmark'
+
+BENCHMARKS = {}
+
+def benchmark(*matrix):
+    def register(f):
+        BENCHMARKS[f.__name__] = (f, matrix)
+        return f
+    return register
+
+def doc_ids(n, seed=0):
+    rng = random.Random(seed)
+    return [rng.randrange(2**31) for _ in range(n)]
+
+def id_bytes(n, length, seed=0):
+    rng = random.Random(seed)
+    return [rng.randbytes(length) for _ in range(n)]
+
+@benchmark(dict(boxes=3, folders=50), dict(boxes=30, folders=500), dict(boxes=300, folders=5000))
+def archive_map_new(boxes, folders):
+    return (lambda: None,
+            lambda _: ArchiveMap.new(boxes=boxes, folders=folders, key=KEY))
+
+@benchmark(dict(boxes=3, folders=100), dict(boxes=30, folders=100), dict(boxes=300, folders=100))
+def folder_placement(boxes, folders):
+    a = ArchiveMap.new(boxes=boxes, folders=folders, key=KEY)
+    return (lambda: a,
+            lambda a: [compute_folder_placement(a, f) for f in a.folders])
+
+@benchmark(dict(folders=50, ids=1000), dict(folders=500, ids=100), dict(folders=5000, ids=10))
+def document_placement(folders, ids):
+    a = ArchiveMap.new(folders=folders, key=KEY)
+    docs = doc_ids(ids)
+    return (lambda: a,
+            lambda a: [compute_document_placement(a, d) for d in docs])
+
+@benchmark(dict(boxes=3, folders=50), dict(boxes=30, folders=500), dict(boxes=300, folders=500))
+def box_folders(boxes, folders):
+    # A fresh map every repetition, so the reverse mapping is built once
+    # per run and then queried for every box.
+    return (lambda: ArchiveMap.new(boxes=boxes, folders=folders, key=KEY),
+            lambda a: [compute_box_folders(a, b) for b in a.boxes])
+
+@benchmark(dict(ids=1000, length=8), dict(ids=10000, length=8), dict(ids=1000, length=11))
+def encode_ids(ids, length):
+    data = id_bytes(ids, length)
+    return (lambda: data,
+            lambda data: [encode(d) for d in data])
+
+@benchmark(dict(ids=1000, length=8), dict(ids=10000, length=8), dict(ids=1000, length=11))
+def encode_many_ids(ids, length):
+    data = id_bytes(ids, length)
+    return (lambda: data,
+            lambda data: encode_many(data))
+
+@benchmark(dict(ids=1000, length=8), dict(ids=10000, length=8))
+def decode_ids(ids, length):
+    data = encode_many(id_bytes(ids, length))
+    return (lambda: data,
+            lambda data: [decode(d, length) for d in data])
+
+@benchmark(dict(ids=1000, length=16), dict(ids=100, length=1 << 16))
+def archive_id(ids, length):
+    data = id_bytes(ids, length)
+    return (lambda: data,
+            lambda data: [new_archive_id(d) for d in data])
+
+@benchmark(dict(module='archive.__main__'), dict(module='archive.mnemonic.encode'))
+def cli_import(module):
+    return (lambda: None,
+            lambda _: subprocess.run([sys.executable, '-c', f'import {module}'], check=True))
+
+def case_name(name, params):
+    return name + ''.join(f' {k}={v}' for (k, v) in params.items())
+
+def run_case(name, params, repeat):
+    (setup, run) = BENCHMARKS[name][0](**params)
+    times = []
+    for _ in range(repeat):
+        inputs = setup()
+        times.append(timeit.timeit(lambda: run(inputs), number=1))
+    return min(times)
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for (case, seconds) in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        ratio = seconds / before
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = ' REGRESSION'
+            regressions.append(case)
+        print(f'{case:<40} {before*1e3:10.2f}ms -> {seconds*1e3:10.2f}ms {ratio:6.2f}x{flag}')
+    return regressions
+
+def main():
+    p = argparse.ArgumentParser(description='Benchmark the placement and id hot paths')
+    p.add_argument('-k', '--filter', type=str, default='', help='Only run benchmarks whose name contains this')
+    p.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions per case, the best is reported')
+    p.add_argument('--json', type=str, metavar='FILE', help='Write results as JSON to FILE (- for stdout)')
+    p.add_argument('--baseline', type=str, metavar='FILE', help='Compare against results previously saved with --json')
+    p.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown against the baseline (default 0.2)')
+    opts = p.parse_args()
+
+    results = {}
+    for (name, (_, matrix)) in BENCHMARKS.items():
+        if opts.filter not in name:
+            continue
+        for params in matrix:
+            case = case_name(name, params)
+            results[case] = run_case(name, params, opts.repeat)
+            if opts.json != '-':
+                print(f'{case:<40} {results[case]*1e3:10.2f}ms', file=sys.stderr if opts.baseline else sys.stdout)
+
+    if opts.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif opts.json:
+        with open(opts.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, opts.tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()